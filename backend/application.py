@@ -1,30 +1,56 @@
-from openai import OpenAI
-from flask import Flask, request, jsonify
-import PyPDF2
+from flask import Flask, request, jsonify, g
 import os
 from dotenv import load_dotenv
 from flask_cors import CORS
 import logging
 import json
 import re
-import requests
-from argon2.exceptions import VerifyMismatchError
-from argon2 import PasswordHasher
-from google.cloud import firestore
-from google.oauth2 import service_account
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 import json
+import io
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from course_index import CourseIndexManager, warmed_index
+from course_search import DEFAULT_SYNONYMS_PATH, load_synonyms
+from pdf_cache import PdfTextCache, content_hash
+from pdf_extraction import PdfExtractor, PdfLimitError, PdfTimeoutError
+from upload_ingest import IngestRequest, NotPdfError, UploadFile, check_pdf_header
+from link_validation import LinkValidator
+from response_cache import MemoryBackend, SqliteBackend, create_cache, make_cache_key, normalize_text
+from jobs import FINISHED, JobRunner, JobStore, QueueFullError, Stage
+from google_tokens import GOOGLE_CERTS_URL, GoogleTokenVerifier
+from llm_dispatch import LLMBusyError, LLMDeadlineError, LLMDispatcher, parse_model_limits
+from log_config import configure_logging
+from bulk_ranking import BulkRanker
+from chat_sessions import ChatSessions
+from question_bank import QuestionBank
+from metrics import Metrics
+from prompt_compaction import compact_document
+from passwords import PasswordService, PasswordServiceBusy
+from session_tokens import SessionTokens
+from student_store import StudentStore
+from streaming import iter_completion_lines, iter_completion_text, sse_event, sse_response, wants_stream
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI()
+# Heavy clients are created on first use so workers boot (and pass health
+# checks) without importing the OpenAI SDK or the Firestore gRPC stack
+_client = None
+_client_lock = threading.Lock()
+
+def get_openai_client():
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                # Retries are handled by LLM below, which knows each call's deadline
+                _client = OpenAI(max_retries=0)
+    return _client
 
 # Initialize Flask application
 application = Flask(__name__)
@@ -72,6 +98,8 @@ print("OpenAI Key (partial):", os.getenv("OPENAI_API_KEY", "")[:8] if os.getenv(
 
 # Enhanced Firestore initialization
 def initialize_firestore():
+    from google.cloud import firestore
+    from google.oauth2 import service_account
     try:
         # Try local service account file
         # local_creds = "jobmatchstudent-firebase-adminsdk-fbsvc-b89d7054b1.json"
@@ -96,130 +124,371 @@ def initialize_firestore():
         print(f"❌ Firestore initialization error: {e}")
         return None
 
-# Initialize Firestore
-db = initialize_firestore()
+# Firestore client; None until first use, and stays None if initialization failed
+db = None
+_db_attempted = False
+
+def get_db():
+    """Return the Firestore client, initializing it on first use."""
+    global db, _db_attempted
+    if db is None and not _db_attempted:
+        with _client_lock:
+            if db is None and not _db_attempted:
+                db = initialize_firestore()
+                _db_attempted = True
+    return db
+
+def server_timestamp():
+    """Firestore's "set to server time" sentinel, without importing Firestore up front."""
+    from google.cloud import firestore
+    return firestore.SERVER_TIMESTAMP
+
+# Set up logging; records are written by a background listener thread
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    log_file=os.getenv("LOG_FILE", "app.log"),
+    json_format=os.getenv("LOG_FORMAT", "json") == "json",
+    use_queue=os.getenv("LOG_ASYNC", "1") == "1"
+)
 
-# Initialize password hasher
-ph = PasswordHasher()
+logger = logging.getLogger(__name__)
 
-# Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
+# Per-process latency metrics, exported at /metrics
+metrics = Metrics(
+    enabled=os.getenv("METRICS_ENABLED", "1") == "1",
+    server_timing=os.getenv("SERVER_TIMING", "0") == "1"
 )
+metrics.describe("http_request_duration_seconds", "Request latency by route")
+metrics.describe("stage_duration_seconds", "Latency of hot-path stages")
+metrics.describe("llm_tokens_total", "OpenAI tokens used by model and kind")
 
-logger = logging.getLogger(__name__)
+@application.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+@application.after_request
+def add_request_id_header(response):
+    request_id = g.get("request_id")
+    if request_id:
+        response.headers["X-Request-ID"] = request_id
+    return response
 
-# Global variable for course data caching
-COURSES_DF = None
+@application.after_request
+def record_request_metrics(response):
+    started = g.pop("request_started", None)
+    if started is None or not metrics.enabled:
+        return response
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe(
+        "http_request_duration_seconds",
+        time.perf_counter() - started,
+        route=route,
+        method=request.method,
+        status=response.status_code
+    )
+    if metrics.server_timing:
+        timing = metrics.server_timing_header()
+        if timing:
+            response.headers["Server-Timing"] = timing
+    return response
 
-def load_course_data():
-    """Load course data from JSON file"""
-    global COURSES_DF
-    if COURSES_DF is not None:
-        return COURSES_DF
+# Read-through cache for student lookups by email
+students = StudentStore(
+    get_db,
+    ttl=int(os.getenv("STUDENT_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("STUDENT_CACHE_MAX_ENTRIES", "10000"))
+)
+
+# Initialize password hasher; hashing runs on a small bounded pool off the request thread
+passwords = PasswordService(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "3")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "4")),
+    max_workers=int(os.getenv("PASSWORD_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_QUEUE_LIMIT", "16")),
+    timeout=float(os.getenv("PASSWORD_TIMEOUT", "10"))
+)
+
+# Signed session tokens issued at login
+session_tokens = SessionTokens(
+    secret=os.getenv("SESSION_SECRET"),
+    max_age=int(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))
+)
+
+# Google ID-token verifier with cached signing certificates
+google_verifier = GoogleTokenVerifier(
+    client_id=os.getenv('GOOGLE_CLIENT_ID'),
+    certs_url=os.getenv('GOOGLE_CERTS_URL', GOOGLE_CERTS_URL)
+)
+
+def busy_response(e):
+    """503 response for requests shed by admission control."""
+    response = jsonify({"success": False, "message": str(e)})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+# Every OpenAI call goes through this: per-model concurrency, rate limit, deadline and retries
+LLM = LLMDispatcher(
+    get_openai_client,
+    concurrency=int(os.getenv("LLM_CONCURRENCY", "8")),
+    model_concurrency=parse_model_limits(os.getenv("LLM_MODEL_CONCURRENCY")),
+    max_queue=int(os.getenv("LLM_QUEUE_LIMIT", "32")),
+    rate=float(os.getenv("LLM_RATE_LIMIT", "0")),
+    burst=float(os.getenv("LLM_RATE_BURST", "0")) or None,
+    timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3"))
+)
+
+def llm_unavailable_response(e, body):
+    """429 for calls shed by the LLM dispatcher, 504 for calls that ran out of time."""
+    response = jsonify(body)
+    if isinstance(e, LLMBusyError):
+        response.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after)))
+        return response, 429
+    return response, 504
+
+# Course matching settings
+COURSE_MATCH_TOP_K = int(os.getenv("COURSE_MATCH_TOP_K", "3"))
+COURSE_MATCH_THRESHOLD = float(os.getenv("COURSE_MATCH_THRESHOLD", "0.1"))
+# "bm25" keyword search with skill synonyms, or "tfidf" cosine similarity
+COURSE_SEARCH_ENGINE = os.getenv("COURSE_SEARCH_ENGINE", "bm25")
+# Comma-separated course number prefixes (e.g. "CS F,IS F") to restrict matches to
+COURSE_MATCH_DEPARTMENTS = [prefix.strip() for prefix in os.getenv("COURSE_MATCH_DEPARTMENTS", "").split(",")
+                            if prefix.strip()]
+COURSE_SEARCH_MAX_LIMIT = int(os.getenv("COURSE_SEARCH_MAX_LIMIT", "50"))
+
+def load_skill_synonyms():
+    """Load the skill alias dictionary used to expand course search queries"""
+    try:
+        return load_synonyms(os.getenv("SKILL_SYNONYMS_PATH", DEFAULT_SYNONYMS_PATH))
+    except (OSError, ValueError) as e:
+        logger.warning("Skill synonyms unavailable, searching without them: %s", e)
+        return {}
+
+SKILL_SYNONYMS = load_skill_synonyms()
+
+# Course index, and with it the shared read-only catalogue. The manager
+# reloads it in the background when data/courses.json changes;
+# COURSE_CATALOGUE_POLL=0 turns the file check off
+COURSE_INDEX = CourseIndexManager(
+    poll_interval=float(os.getenv("COURSE_CATALOGUE_POLL", "30")),
+    # Under gunicorn the master has already loaded it (see gunicorn.conf.py)
+    initial=warmed_index()
+)
+
+def load_course_index():
+    """Return the current TF-IDF course index, or None if it could not be loaded"""
     try:
-        courses_df = pd.read_json('data/courses.json')
-        COURSES_DF = courses_df
-        logger.info(f"Loaded {len(courses_df)} courses from database")
-        return courses_df
+        return COURSE_INDEX.current()
     except Exception as e:
-        logger.error(f"Error loading course data: {e}")
-        return pd.DataFrame()
+        logger.error("Error loading course index: %s", e)
+        return None
 
-def find_similar_courses(missing_skills, threshold=0.1):
-    """Find most similar courses for each missing skill using cosine similarity"""
-    courses_df = load_course_data()
-    if courses_df.empty:
-        return {}
+def load_course_data():
+    """Return the shared course catalogue, or None if it could not be loaded"""
+    index = load_course_index()
+    return index.catalogue if index is not None else None
+
+# Extracted PDF text cache, shared across workers when PDF_CACHE_DIR is set
+PDF_TEXT_CACHE = PdfTextCache(
+    max_memory_bytes=int(os.getenv("PDF_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024))),
+    disk_dir=os.getenv("PDF_CACHE_DIR") or None,
+    max_disk_bytes=int(os.getenv("PDF_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+)
 
-    # Combine Course Title with Description and Scope for better matching
-    courses_df['Combined'] = (
-        courses_df['Course Title'] + ' ' +
-        courses_df['Description']
-    )
+# Process pool for PDF parsing, with limits so one bad upload can't stall a worker
+PDF_EXTRACTOR = PdfExtractor(
+    max_workers=int(os.getenv("PDF_WORKERS", "0")) or None,
+    max_pages=int(os.getenv("PDF_MAX_PAGES", "50")),
+    max_bytes=int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024))),
+    timeout=float(os.getenv("PDF_TIMEOUT", "20")),
+    pages_per_task=int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+)
 
-    # Create corpus of course descriptions
-    corpus = courses_df['Combined'].tolist()
-    
-    # Initialize TF-IDF vectorizer
-    vectorizer = TfidfVectorizer(
-        stop_words='english',
-        max_features=1000,
-        ngram_range=(1, 2)
-    )
+class UploadRequest(IngestRequest):
+    """Uploads are hashed, size-checked and spooled while the request body is read"""
+    upload_max_bytes = PDF_EXTRACTOR.max_bytes
+    upload_spool_bytes = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+    upload_dir = os.getenv("UPLOAD_DIR") or None
+
+application.request_class = UploadRequest
+# Whole request bodies over this are refused before any of them is read
+application.config['MAX_CONTENT_LENGTH'] = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(256 * 1024 * 1024)))
+
+# Pooled, cached checker for GPT course recommendation links
+LINK_VALIDATOR = LinkValidator(
+    max_workers=int(os.getenv("LINK_CHECK_WORKERS", "8")),
+    request_timeout=float(os.getenv("LINK_CHECK_TIMEOUT", "5")),
+    deadline=float(os.getenv("LINK_CHECK_DEADLINE", "6")),
+    good_ttl=int(os.getenv("LINK_CACHE_GOOD_TTL", str(24 * 3600))),
+    bad_ttl=int(os.getenv("LINK_CACHE_BAD_TTL", "3600"))
+)
 
-    # Fit vectorizer on course corpus
-    course_vectors = vectorizer.fit_transform(corpus)
-    
-    results = {}
-    for skill in missing_skills:
-        try:
-            # Transform the missing skill
-            skill_vector = vectorizer.transform([skill])
-            
-            # Calculate cosine similarities
-            similarities = cosine_similarity(skill_vector, course_vectors).flatten()
-            
-            # Find the best match
-            max_idx = np.argmax(similarities)
-            max_similarity = similarities[max_idx]
-            
-            # Only include if similarity is above threshold
-            if max_similarity >= threshold:
-                results[skill] = {
-                    "Course No": courses_df.iloc[max_idx]['Course No'],
-                    "Course Title": courses_df.iloc[max_idx]['Course Title'], 
-                    "Similarity": float(max_similarity),
-                    "Description and Scope": courses_df.iloc[max_idx]['Description'][:100] + "..."
-                }
-            else:
-                results[skill] = {
-                    "Course No": "N/A",
-                    "Course Title": "No suitable course found",
-                    "Similarity": 0.0,
-                    "Description and Scope": "Consider external courses for this skill"
-                }
-        except Exception as e:
-            logger.error(f"Error processing skill '{skill}': {e}")
-            results[skill] = {
+# Cache of /analyze results; use the sqlite backend to share it across workers
+ANALYSIS_CACHE = create_cache(
+    backend=os.getenv("LLM_CACHE_BACKEND", "memory"),
+    path=os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3"),
+    ttl=int(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+)
+
+# Generated questions are banked and reused for later requests about the same JD,
+# CV or skills; only the shortfall is generated. Bump the version when the
+# questions prompt changes so old questions stop being served
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK", "1") == "1"
+QUESTION_PROMPT_VERSION = "1"
+QUESTION_BANK = QuestionBank(
+    os.getenv("QUESTION_BANK_PATH", "data/question_bank.sqlite3"),
+    version=QUESTION_PROMPT_VERSION,
+    ttl=int(os.getenv("QUESTION_BANK_TTL", str(30 * 24 * 3600))),
+    max_skill_questions=int(os.getenv("QUESTION_BANK_SKILL_QUESTIONS", "4"))
+) if QUESTION_BANK_ENABLED else None
+
+# How often and how long /analyze/jobs/<id>/events watches a job. Each stream
+# holds a gunicorn worker, so it is kept short; polling /analyze/jobs/<id> is
+# the supported way to wait longer, or the client reconnects after "timeout"
+JOB_EVENTS_POLL_INTERVAL = 0.5
+JOB_EVENTS_TIMEOUT = float(os.getenv("JOB_EVENTS_TIMEOUT", "20"))
+
+# Bump when the analysis prompt changes so old cached answers are not reused
+ANALYSIS_MODEL = "gpt-4o-mini"
+ANALYSIS_PROMPT_VERSION = "2"
+
+# JD and CV text is cleaned and trimmed to these estimated token budgets before prompting
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "1") == "1"
+PROMPT_JD_TOKENS = int(os.getenv("PROMPT_JD_TOKENS", "1500"))
+PROMPT_CV_TOKENS = int(os.getenv("PROMPT_CV_TOKENS", "2000"))
+metrics.describe("prompt_document_tokens_total", "Estimated JD/CV prompt tokens before and after compaction")
+
+# Chat sessions keep the context once and bound the history sent with each turn
+CHAT_SESSION_TTL = int(os.getenv("CHAT_SESSION_TTL", str(6 * 3600)))
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "1200"))
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1200"))
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+CHAT_SUMMARY_TIMEOUT = float(os.getenv("CHAT_SUMMARY_TIMEOUT", "20"))
+
+# PDF workers are spawned, so running this file directly re-imports it in each
+# worker as __mp_main__; startup work belongs to the real app process only
+IS_MAIN_PROCESS = __name__ != '__mp_main__'
+
+# Load the course index at startup so requests never pay for the fit;
+# PRELOAD_COURSE_INDEX=0 defers it to the first request that matches courses
+if IS_MAIN_PROCESS and os.getenv("PRELOAD_COURSE_INDEX", "1") == "1":
+    load_course_index()
+
+def match_courses(index, queries, top_k, threshold, departments=None):
+    """Return (row, score) matches per query from the configured search engine"""
+    if COURSE_SEARCH_ENGINE == "tfidf":
+        return index.top_k(queries, k=top_k, threshold=threshold)
+    return index.search.top_k(queries, k=top_k, threshold=threshold,
+                              prefixes=departments or COURSE_MATCH_DEPARTMENTS, synonyms=SKILL_SYNONYMS)
+
+def find_similar_courses(missing_skills, threshold=COURSE_MATCH_THRESHOLD, top_k=COURSE_MATCH_TOP_K):
+    """Find the most similar courses for all missing skills in one batched lookup"""
+    index = load_course_index()
+    if index is None:
+        return {}
+
+    skills = list(dict.fromkeys(missing_skills))
+    try:
+        matches = match_courses(index, skills, top_k, threshold)
+    except Exception as e:
+        logger.error("Error matching skills to courses: %s", e)
+        return {
+            skill: {
                 "Course No": "ERROR",
                 "Course Title": "Error processing skill",
                 "Similarity": 0.0,
                 "Description and Scope": "Error occurred during processing"
             }
-    
+            for skill in skills
+        }
+
+    results = {}
+    for skill, skill_matches in zip(skills, matches):
+        if skill_matches:
+            # Best match keeps the original response shape, the rest are extra options
+            best_row, best_score = skill_matches[0]
+            results[skill] = index.course(best_row, best_score)
+            results[skill]["Alternatives"] = [
+                index.course(row, score) for row, score in skill_matches[1:]
+            ]
+        else:
+            results[skill] = {
+                "Course No": "N/A",
+                "Course Title": "No suitable course found",
+                "Similarity": 0.0,
+                "Description and Scope": "Consider external courses for this skill",
+                "Alternatives": []
+            }
+
     return results
 
 def is_valid_url(url):
     """Check if a given URL is valid and reachable within 5 seconds."""
+    return LINK_VALIDATOR.validate([url])[url]
+
+def upload_source(pdf_file):
+    """(cache key, extractor input) for an uploaded file or any binary file object"""
+    stream = getattr(pdf_file, 'stream', pdf_file)
+    if isinstance(stream, UploadFile):
+        # Already hashed and checked while the upload was received
+        return stream.content_hash, stream.source()
+    data = pdf_file.read()
+    check_pdf_header(data)
+    return content_hash(data), data
+
+def extract_texts_from_pdfs(pdf_files):
+    """Extract raw text from several uploaded PDF files in parallel, reusing cached text."""
     try:
-        response = requests.head(url, timeout=5, allow_redirects=True)
-        return response.status_code == 200
-    except requests.RequestException:
-        return False
+        documents = [upload_source(pdf_file) for pdf_file in pdf_files]
+        keys = [key for key, _ in documents]
+        texts = [PDF_TEXT_CACHE.get(key) for key in keys]
+
+        misses = [i for i, text in enumerate(texts) if text is None]
+        if misses:
+            with metrics.span("pdf_extract"):
+                extracted = PDF_EXTRACTOR.extract_many([documents[i][1] for i in misses])
+            for i, text in zip(misses, extracted):
+                PDF_TEXT_CACHE.put(keys[i], text)
+                texts[i] = text
+        logger.info('PDF text extraction successful (%d from cache)', len(documents) - len(misses))
+        return texts
+    except Exception as e:
+        logger.error("Error extracting text from PDF: %s", e)
+        raise
 
 def extract_text_from_pdf(pdf_file):
     """Extract raw text from an uploaded PDF file."""
-    try:
-        reader = PyPDF2.PdfReader(pdf_file)
-        text = ''
-        for page in reader.pages:
-            text += page.extract_text()
-        logger.info('PDF text extraction successful')
-        return text
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF: {e}")
-        raise
+    return extract_texts_from_pdfs([pdf_file])[0]
+
+def analysis_cache_key(job_description, cv_text):
+    """Cache key for one JD + CV analysis"""
+    return make_cache_key(
+        normalize_text(job_description),
+        normalize_text(cv_text),
+        ANALYSIS_MODEL,
+        ANALYSIS_PROMPT_VERSION,
+        PROMPT_COMPACTION and (PROMPT_JD_TOKENS, PROMPT_CV_TOKENS)
+    )
 
-def compare_with_gpt_for_non_immediate_interview(job_description, cv_text):
-    """Send job description + CV to GPT for analysis."""
-    try:
-        prompt = f"""
+def compact_for_prompt(text, max_tokens, document):
+    """Clean up extracted text and trim it to its prompt token budget."""
+    if not PROMPT_COMPACTION:
+        return text
+    with metrics.span("prompt_compaction"):
+        compacted, tokens_before, tokens_after = compact_document(text, max_tokens)
+    metrics.inc("prompt_document_tokens_total", tokens_before, document=document, stage="raw")
+    metrics.inc("prompt_document_tokens_total", tokens_after, document=document, stage="compacted")
+    logger.info("Compacted %s from ~%d to ~%d tokens", document, tokens_before, tokens_after)
+    return compacted
+
+def request_gpt_analysis(job_description, cv_text, deadline=None):
+    """Ask GPT to analyze the JD + CV match and parse its JSON answer."""
+    job_description = compact_for_prompt(job_description, PROMPT_JD_TOKENS, "job_description")
+    cv_text = compact_for_prompt(cv_text, PROMPT_CV_TOKENS, "cv")
+    prompt = f"""
 Job Description: {job_description}
 
 CV Content: {cv_text}
@@ -233,51 +502,238 @@ Analyze the match between the job description and the CV. Return a JSON object w
 For missing skills, be specific (e.g., "Python programming", "Machine Learning", "React.js") rather than vague.
 """
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+    with metrics.span("openai"):
+        response = LLM.create(
+            model=ANALYSIS_MODEL,
+            deadline=deadline,
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that analyzes job matches."},
                 {"role": "user", "content": prompt}
             ]
         )
+    metrics.record_llm_usage(ANALYSIS_MODEL, response)
 
-        feedback_raw = response.choices[0].message.content.strip()
-        match = re.search(r"\{.*\}", feedback_raw, re.DOTALL)
-        
-        if not match:
-            logger.error("No JSON object found in GPT response.")
-            raise ValueError("Invalid response format from GPT")
-        
-        feedback = json.loads(match.group(0))
-        
-        # Keep only valid course URLs for external recommendations
-        feedback['course_recommendations'] = [
-            course for course in feedback.get('course_recommendations', [])
-            if is_valid_url(course['url'])
-        ]
-        
-        # Add BITS course recommendations based on missing skills
-        missing_skills = feedback.get('missing', [])
-        if missing_skills:
-            logger.info(f"Finding BITS courses for missing skills: {missing_skills}")
-            bits_recommendations = find_similar_courses(missing_skills)
-            feedback['bits_recommendations'] = bits_recommendations
-        else:
-            feedback['bits_recommendations'] = {}
-        
+    feedback_raw = response.choices[0].message.content.strip()
+    match = re.search(r"\{.*\}", feedback_raw, re.DOTALL)
+    
+    if not match:
+        logger.error("No JSON object found in GPT response.")
+        raise ValueError("Invalid response format from GPT")
+    
+    return json.loads(match.group(0))
+
+def filter_course_links(feedback):
+    """Keep only valid course URLs for external recommendations, checked concurrently."""
+    courses = feedback.get('course_recommendations', [])
+    with metrics.span("link_validation"):
+        valid_urls = LINK_VALIDATOR.validate([course['url'] for course in courses])
+    feedback['course_recommendations'] = [
+        course for course in courses
+        if valid_urls[course['url']]
+    ]
+
+def add_bits_recommendations(feedback):
+    """Add BITS course recommendations based on missing skills."""
+    missing_skills = feedback.get('missing', [])
+    if missing_skills:
+        logger.debug("Finding BITS courses for missing skills: %s", missing_skills)
+        with metrics.span("course_matching"):
+            feedback['bits_recommendations'] = find_similar_courses(missing_skills)
+    else:
+        feedback['bits_recommendations'] = {}
+
+def compare_with_gpt_for_non_immediate_interview(job_description, cv_text):
+    """Send job description + CV to GPT for analysis, reusing cached results for repeat pairs."""
+    cache_key = analysis_cache_key(job_description, cv_text)
+    feedback = ANALYSIS_CACHE.get(cache_key)
+    if feedback is not None:
+        logger.info("Analysis served from cache")
+        return feedback
+
+    try:
+        feedback = request_gpt_analysis(job_description, cv_text)
+        filter_course_links(feedback)
+        add_bits_recommendations(feedback)
+        ANALYSIS_CACHE.set(cache_key, feedback)
         return feedback
         
     except Exception as e:
-        logger.error(f"Error in GPT API request: {e}")
+        logger.error("Error in GPT API request: %s", e)
         raise
 
+# -------------------- ASYNC ANALYSIS PIPELINE --------------------
+
+def analysis_stage_extract(inputs, state, deadline):
+    """Pipeline stage: extract JD and CV text."""
+    jd_text, cv_text = extract_texts_from_pdfs(
+        [io.BytesIO(inputs['job_description']), io.BytesIO(inputs['cv'])]
+    )
+    state['job_description'] = jd_text
+    state['cv_text'] = cv_text
+
+def analysis_stage_gpt(inputs, state, deadline):
+    """Pipeline stage: GPT analysis, short-circuiting on a cached result."""
+    cached = ANALYSIS_CACHE.get(analysis_cache_key(state['job_description'], state['cv_text']))
+    if cached is not None:
+        state['result'] = cached
+        state['done'] = True
+        return
+    state['feedback'] = request_gpt_analysis(state['job_description'], state['cv_text'], deadline=deadline)
+
+def analysis_stage_links(inputs, state, deadline):
+    """Pipeline stage: validate external course links."""
+    filter_course_links(state['feedback'])
+
+def analysis_stage_courses(inputs, state, deadline):
+    """Pipeline stage: match missing skills to BITS courses and cache the result."""
+    feedback = state['feedback']
+    add_bits_recommendations(feedback)
+    if time.monotonic() >= deadline:
+        # The job has already failed on this stage's timeout; don't cache its leftovers
+        return
+    ANALYSIS_CACHE.set(analysis_cache_key(state['job_description'], state['cv_text']), feedback)
+    state['result'] = feedback
+
+JOB_RUNNER = JobRunner(
+    JobStore(os.getenv("JOB_DB_PATH", "data/jobs.sqlite3")),
+    max_workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_queued=int(os.getenv("JOB_QUEUE_LIMIT", "100")),
+    retention=int(os.getenv("JOB_RETENTION", str(24 * 3600)))
+)
+JOB_RUNNER.register("analyze", [
+    Stage("extract", analysis_stage_extract, timeout=PDF_EXTRACTOR.timeout + 5),
+    Stage("gpt", analysis_stage_gpt, timeout=float(os.getenv("JOB_GPT_TIMEOUT", "120"))),
+    Stage("links", analysis_stage_links, timeout=LINK_VALIDATOR.deadline + 2),
+    Stage("courses", analysis_stage_courses, timeout=float(os.getenv("JOB_COURSES_TIMEOUT", "15")))
+])
+
+# Pick up jobs left behind by a worker that restarted
+if IS_MAIN_PROCESS:
+    JOB_RUNNER.recover()
+
+def job_payload(job):
+    """Public view of a job for the status endpoints."""
+    payload = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"]
+    }
+    if job["result"] is not None:
+        payload["feedback"] = job["result"]
+    if job["error"]:
+        payload["error"] = job["error"]
+    return payload
+
+# -------------------- BULK RANKING --------------------
+
+# Every document is pre-scored locally; only the shortlist goes to GPT
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "300"))
+BULK_SHORTLIST = int(os.getenv("BULK_SHORTLIST", "10"))
+BULK_MAX_SHORTLIST = int(os.getenv("BULK_MAX_SHORTLIST", "25"))
+
+BULK_RANKER = BulkRanker(
+    extract_texts_from_pdfs,
+    compare_with_gpt_for_non_immediate_interview,
+    max_concurrency=int(os.getenv("BULK_GPT_CONCURRENCY", "4")),
+    # Keep each extraction batch within what the pool runs side by side
+    batch_size=PDF_EXTRACTOR.max_workers * 2
+)
+
+def stream_bulk_ranking(anchor_text, anchor_is_cv, ranking, texts):
+    """Send the pre-score ranking, then each shortlisted analysis as it finishes"""
+    results = []
+    try:
+        yield sse_event("ranking", {"ranking": ranking})
+        for result in BULK_RANKER.analyze_shortlist(anchor_text, anchor_is_cv, ranking, texts):
+            results.append(result)
+            yield sse_event("result", result)
+        yield sse_event("done", {"success": True, "results": order_bulk_results(results)})
+    except Exception as e:
+        logger.error("Error streaming bulk ranking: %s", e)
+        yield sse_event("error", {"success": False, "message": str(e)})
+
+def order_bulk_results(results):
+    """Analyzed candidates by GPT match percentage, then pre-score rank"""
+    def match_percentage(result):
+        try:
+            return float(result.get("feedback", {}).get("match_percentage", 0))
+        except (TypeError, ValueError):
+            return 0.0
+    return sorted(results, key=lambda result: (-match_percentage(result), result["rank"]))
+
+# -------------------- METRICS --------------------
+
+CACHE_STATS = {
+    "pdf_text": PDF_TEXT_CACHE.stats,
+    "analysis": ANALYSIS_CACHE.stats,
+    "links": LINK_VALIDATOR.stats,
+    "students": students.stats
+}
+if QUESTION_BANK is not None:
+    CACHE_STATS["question_bank"] = QUESTION_BANK.stats
+
+def cache_gauge(compute):
+    """Gauge callback applying ``compute(stats)`` to every cache."""
+    return lambda: {(("cache", name),): compute(stats()) for name, stats in CACHE_STATS.items()}
+
+def hit_ratio(stats):
+    total = stats["hits"] + stats["misses"]
+    return stats["hits"] / total if total else 0.0
+
+metrics.register_gauge("cache_hits", cache_gauge(lambda stats: stats["hits"]), "Cache hits since worker start")
+metrics.register_gauge("cache_misses", cache_gauge(lambda stats: stats["misses"]), "Cache misses since worker start")
+metrics.register_gauge("cache_hit_ratio", cache_gauge(hit_ratio), "Cache hit ratio since worker start")
+metrics.register_gauge(
+    "student_lookup_seconds",
+    lambda: {
+        (("stat", "avg"),): students.stats()["query_seconds_avg"],
+        (("stat", "max"),): students.stats()["query_seconds_max"]
+    },
+    "Firestore student lookup latency"
+)
+metrics.register_gauge("google_cert_fetches", lambda: google_verifier.cert_fetches, "Google certificate downloads")
+metrics.register_gauge(
+    "course_index_reloads",
+    lambda: {(("kind", kind),): count for kind, count in COURSE_INDEX.reloads.items()},
+    "Course index reloads after catalogue changes, by how the new index was made"
+)
+metrics.register_gauge("google_token_cache_hits", lambda: google_verifier.token_hits, "Google ID tokens served from cache")
+metrics.register_gauge(
+    "chat_session_folds",
+    lambda: {(("kind", kind),): CHAT_SESSIONS.stats()[kind] for kind in ("summary", "excerpt")},
+    "Old chat turns folded into a session summary, by how the summary was made"
+)
+
+def llm_gauge(field):
+    """Gauge callback reading one dispatcher stat for every model."""
+    return lambda: {(("model", model),): stats.get(field, 0) for model, stats in LLM.stats().items()}
+
+def llm_outcomes():
+    return {
+        (("model", model), ("outcome", outcome)): stats.get(outcome, 0)
+        for model, stats in LLM.stats().items()
+        for outcome in ("ok", "retried", "failed", "shed", "deadline")
+    }
+
+metrics.register_gauge("llm_waiting", llm_gauge("waiting"), "OpenAI calls waiting for a slot")
+metrics.register_gauge("llm_in_flight", llm_gauge("in_flight"), "OpenAI calls in progress")
+metrics.register_gauge("llm_calls", llm_outcomes, "OpenAI call attempts by outcome since worker start")
+
 # -------------------- ROUTES --------------------
 
 @application.route('/')
 def index():
     """Health check route — confirms backend is running."""
+    # Doesn't force the lazy Firestore init; false until a request has used it
     return jsonify({"status": "Backend is running", "db_connected": db is not None})
 
+@application.route('/metrics')
+def metrics_endpoint():
+    """Prometheus-style metrics for this worker."""
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
 @application.route('/signUp', methods=['POST'])
 def add_student():
     """Register a new student."""
@@ -292,21 +748,23 @@ def add_student():
                 return jsonify({"success": False, "message": f"Missing field: {field}"}), 400
 
         # Check if student already exists
-        existing_student = db.collection("students").where("email", "==", data["email"]).limit(1).get()
+        existing_student = students.find_by_email(data["email"])
         if existing_student:
             return jsonify({"success": False, "message": "Student with this email already exists"}), 409
 
         # Hash password and save student
-        hashed_password = ph.hash(data["password"])
+        hashed_password = passwords.hash(data["password"])
         data["password"] = hashed_password
         
-        db.collection("students").add(data)
-        logger.info(f"New student registered: {data['email']}")
+        students.add(data)
+        logger.info("New student registered: %s", data['email'])
         
         return jsonify({"success": True, "message": "Student added!"}), 201
 
+    except PasswordServiceBusy as e:
+        return busy_response(e)
     except Exception as e:
-        logger.error(f"Error in student registration: {e}")
+        logger.error("Error in student registration: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
 @application.route('/login', methods=['POST'])
@@ -323,55 +781,93 @@ def login_student():
         if not email or not password:
             return jsonify({"success": False, "message": "Email and password required"}), 400
 
-        students_ref = db.collection("students").where("email", "==", email).limit(1).get()
+        student_doc = students.find_by_email(email)
 
-        if not students_ref:
+        if not student_doc:
             return jsonify({"success": False, "message": "Invalid email or password"}), 401
 
-        student_doc = students_ref[0]
         student_data = student_doc.to_dict()
 
-        try:
-            ph.verify(student_data["password"], password)
-        except VerifyMismatchError:
+        valid, new_hash = passwords.verify(student_data["password"], password)
+        if not valid:
             return jsonify({"success": False, "message": "Invalid email or password"}), 401
 
-        logger.info(f"Student login successful: {email}")
+        if new_hash:
+            # Stored hash used older cost parameters; upgrade it transparently
+            students.update(student_doc.id, email, {"password": new_hash})
+            logger.info("Rehashed password for: %s", email)
+
+        logger.info("Student login successful: %s", email)
         
+        student = {
+            "id": student_doc.id,
+            "name": student_data.get("name"),
+            "email": student_data.get("email")
+        }
         return jsonify({
             "success": True,
             "message": "Login successful",
-            "student": {
-                "id": student_doc.id,
-                "name": student_data.get("name"),
-                "email": student_data.get("email")
-            }
+            "student": student,
+            "token": session_tokens.issue(student)
         }), 200
 
+    except PasswordServiceBusy as e:
+        return busy_response(e)
     except Exception as e:
-        logger.error(f"Error in student login: {e}")
+        logger.error("Error in student login: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
-# application.py — replace only this endpoint
+@application.route('/session', methods=['GET'])
+def current_session():
+    """Return the student for a session token without touching Firestore."""
+    if not session_tokens.enabled:
+        return jsonify({"success": False, "message": "Sessions are not configured"}), 503
+    student = session_tokens.from_request(request)
+    if student is None:
+        return jsonify({"success": False, "message": "Invalid or expired session"}), 401
+    return jsonify({"success": True, "student": student}), 200
 
-@application.route('/generate-questions', methods=['POST'])
-def generate_questions():
-    try:
-        data = request.get_json(force=True) or {}
-        job_description = (data.get('jobDescription') or '').strip()
-        cv_text = (data.get('cvText') or '').strip()
+# application.py — replace only this endpoint
 
-        # Optional scaffolding from your analysis to bias specificity
-        jd_skills_found = data.get('skillsFound') or []
-        jd_skills_missing = data.get('skillsMissing') or []
-        top_courses = data.get('topCourses') or []  # optional
+# Number of interview questions returned by /generate-questions
+QUESTION_LIMIT = 10
 
-        if not job_description and not cv_text:
-            return jsonify({"success": False, "message": "Provide jobDescription and/or cvText"}), 400
+def question_bank_keys(job_description, cv_text):
+    """(jd_hash, cv_hash) for banking; jd_hash is None without a job description"""
+    jd_hash = make_cache_key("questions", QUESTION_PROMPT_VERSION, normalize_text(job_description)) \
+        if job_description else None
+    return jd_hash, make_cache_key("questions-cv", QUESTION_PROMPT_VERSION, normalize_text(cv_text))
 
-        # Craft explicit, grounded prompt
-        prompt = f"""
-You are an expert interviewer. Create 10 interview questions that are SPECIFIC to the following inputs.
+def banked_questions(job_description, cv_text, jd_cues, fresh=False):
+    """Banked questions for this request, or [] when the bank is off or bypassed"""
+    if QUESTION_BANK is None or fresh:
+        return []
+    try:
+        with metrics.span("question_bank"):
+            return QUESTION_BANK.lookup(*question_bank_keys(job_description, cv_text), jd_cues, QUESTION_LIMIT)
+    except sqlite3.Error as e:
+        # The bank only saves LLM calls; never fail the request over it
+        logger.warning("Question bank lookup failed: %s", e)
+        return []
+
+def bank_questions(job_description, cv_text, questions, jd_cues, guessed_tags=()):
+    if QUESTION_BANK is None or not questions:
+        return
+    try:
+        QUESTION_BANK.add(*question_bank_keys(job_description, cv_text), questions, jd_cues, guessed_tags)
+    except sqlite3.Error as e:
+        logger.warning("Question bank write failed: %s", e)
+
+def build_questions_prompt(job_description, cv_text, jd_skills_found, jd_skills_missing,
+                           count=QUESTION_LIMIT, existing=()):
+    """Craft explicit, grounded prompt"""
+    technical = round(count * 0.6)
+    avoid = ""
+    if existing:
+        avoid = "\n- These questions were already asked; do not repeat or rephrase them:\n" + \
+            "\n".join(f"  - {q}" for q in existing)
+    return f"""
+You are an expert interviewer. Create {count} interview questions that are SPECIFIC to the following inputs.
 
 JOB DESCRIPTION (JD):
 {job_description if job_description else "[none provided]"}
@@ -385,13 +881,13 @@ CONSTRAINTS:
   B) a concrete CV experience/achievement (project, metric, stack, responsibility).
 - Avoid generic questions (e.g., "Tell me about yourself").
 - Prefer questions that verify ability to DO the JD responsibilities using the candidate’s documented CV skills.
-- Mix: 6 technical/task/architecture/process questions, 4 behavioral/situational questions tied to JD responsibilities.
+- Mix: {technical} technical/task/architecture/process questions, {count - technical} behavioral/situational questions tied to JD responsibilities.
 - Where possible, weave at least one of these JD-derived or analysis-derived cues:
   - JD skills/keywords: {", ".join(jd_skills_found[:10]) if jd_skills_found else "[none]"}
-  - Missing skills to probe: {", ".join(jd_skills_missing[:10]) if jd_skills_missing else "[none]"}
+  - Missing skills to probe: {", ".join(jd_skills_missing[:10]) if jd_skills_missing else "[none]"}{avoid}
 
 FORMAT:
-- Return a numbered list (1-10) of concise questions only.
+- Return a numbered list (1-{count}) of concise questions only.
 - For each question, append a source tag in brackets indicating [JD] or [CV], or [JD+CV] if combined.
 
 EXAMPLES OF SPECIFICITY:
@@ -401,103 +897,295 @@ EXAMPLES OF SPECIFICITY:
   "Describe an A/B test you ran; how would you adapt your experiment design to match the JD’s funnel metrics?" [JD+CV]
 """
 
-        # Use a strong model with focused decoding
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You produce strictly grounded, role-specific interview questions."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1200
+def parse_question_line(line):
+    """Strip numbering/bullets from one completion line; return None if it isn't a question"""
+    q = re.sub(r'^\s*(\d+[\).\s-]|[-*•])\s*', '', line.strip())
+    if len(q) > 15 and '?' in q:
+        return q
+    return None
+
+def tag_question(q, jd_cues):
+    """Ensure a question has a [JD]/[CV] tag; if missing, add heuristic tag"""
+    if '[JD' in q or '[CV' in q:
+        return q
+    lower_q = q.lower()
+    # Heuristics using JD/CV cues
+    hits_jd = any(k.lower() in lower_q for k in jd_cues) or ("according to the jd" in lower_q)
+    hits_cv = any(word in lower_q for word in ["your project", "on your resume", "in your cv", "in your experience"])
+    if hits_jd and hits_cv:
+        return f"{q} [JD+CV]"
+    elif hits_cv:
+        return f"{q} [CV]"
+    return f"{q} [JD]"
+
+def stream_questions(stream, jd_cues, banked=(), on_generated=None):
+    """Emit banked questions, then each generated one as soon as its line is complete"""
+    questions = []
+    generated = []
+    guessed_tags = []
+    try:
+        for q in banked:
+            yield sse_event("question", {"index": len(questions), "question": q})
+            questions.append(q)
+        for line in (iter_completion_lines(stream) if stream is not None else ()):
+            if len(questions) >= QUESTION_LIMIT:
+                break
+            q = parse_question_line(line)
+            if q is None:
+                continue
+            tagged = tag_question(q, jd_cues)
+            if tagged != q:
+                guessed_tags.append(tagged)
+            q = tagged
+            yield sse_event("question", {"index": len(questions), "question": q})
+            questions.append(q)
+            generated.append(q)
+        if on_generated is not None:
+            on_generated(generated, guessed_tags)
+        yield sse_event("done", {"success": True, "questions": questions})
+    except Exception as e:
+        logger.error("Error streaming questions: %s", e)
+        yield sse_event("error", {"success": False, "message": str(e)})
+    finally:
+        # Stop the completion early once we have enough questions
+        if stream is not None:
+            stream.close()
+
+@application.route('/generate-questions', methods=['POST'])
+def generate_questions():
+    try:
+        data = request.get_json(force=True) or {}
+        job_description = (data.get('jobDescription') or '').strip()
+        cv_text = (data.get('cvText') or '').strip()
+
+        # Optional scaffolding from your analysis to bias specificity
+        jd_skills_found = data.get('skillsFound') or []
+        jd_skills_missing = data.get('skillsMissing') or []
+        top_courses = data.get('topCourses') or []  # optional
+
+        if not job_description and not cv_text:
+            return jsonify({"success": False, "message": "Provide jobDescription and/or cvText"}), 400
+
+        jd_cues = jd_skills_found + jd_skills_missing
+        # "fresh": true skips the bank and always generates a new set
+        banked = banked_questions(job_description, cv_text, jd_cues, fresh=bool(data.get('fresh')))
+        if QUESTION_BANK is not None:
+            QUESTION_BANK.record(len(banked), QUESTION_LIMIT)
+        if len(banked) >= QUESTION_LIMIT:
+            if wants_stream(data):
+                return sse_response(stream_questions(None, jd_cues, banked))
+            return jsonify({"success": True, "questions": banked[:QUESTION_LIMIT]})
+
+        prompt = build_questions_prompt(
+            compact_for_prompt(job_description, PROMPT_JD_TOKENS, "job_description"),
+            compact_for_prompt(cv_text, PROMPT_CV_TOKENS, "cv"),
+            jd_skills_found,
+            jd_skills_missing,
+            count=QUESTION_LIMIT - len(banked),
+            existing=banked
         )
 
+        # Use a strong model with focused decoding
+        with metrics.span("openai"):
+            completion = LLM.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": "You produce strictly grounded, role-specific interview questions."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=1200,
+                stream=wants_stream(data)
+            )
+        metrics.record_llm_usage("gpt-4o-mini", completion)
+
+        if wants_stream(data):
+            return sse_response(stream_questions(
+                completion, jd_cues, banked,
+                lambda generated, guessed_tags: bank_questions(
+                    job_description, cv_text, generated, jd_cues, guessed_tags
+                )
+            ))
+
         raw = completion.choices[0].message.content.strip()
 
         # Parse questions and enforce grounding
-        lines = [l.strip() for l in raw.splitlines() if l.strip()]
-        questions = []
-        for line in lines:
-            # remove numbering/bullets
-            import re
-            q = re.sub(r'^\s*(\d+[\).\s-]|[-*•])\s*', '', line)
-            if len(q) > 15 and '?' in q:
-                questions.append(q)
-
-        # Final safety pass: ensure each has a [JD]/[CV] tag; if missing, add heuristic tag
-        tagged = []
-        for q in questions:
-            tag = ''
-            lower_q = q.lower()
-            # Heuristics using JD/CV cues
-            jd_cues = (jd_skills_found or []) + (jd_skills_missing or [])
-            hits_jd = any(k.lower() in lower_q for k in jd_cues) or ("according to the jd" in lower_q)
-            hits_cv = any(word in lower_q for word in ["your project", "on your resume", "in your cv", "in your experience"])
-            if '[JD' in q or '[CV' in q:
-                tagged.append(q)
-            else:
-                if hits_jd and hits_cv:
-                    tagged.append(f"{q} [JD+CV]")
-                elif hits_cv:
-                    tagged.append(f"{q} [CV]")
-                else:
-                    tagged.append(f"{q} [JD]")
+        questions = [q for q in map(parse_question_line, raw.splitlines()) if q]
+        tagged = [tag_question(q, jd_cues) for q in questions]
+        guessed_tags = [t for q, t in zip(questions, tagged) if t != q]
 
         # Limit to 10 best
-        tagged = tagged[:10]
+        tagged = tagged[:QUESTION_LIMIT - len(banked)]
+        bank_questions(job_description, cv_text, tagged, jd_cues, guessed_tags)
 
         return jsonify({
             "success": True,
-            "questions": tagged
+            "questions": banked + tagged
         })
 
+    except (LLMBusyError, LLMDeadlineError) as e:
+        return llm_unavailable_response(e, {"success": False, "message": str(e)})
     except Exception as e:
         application.logger.exception("Error in generate_questions")
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+CHAT_SYSTEM_PROMPT = """You are an expert career coach and interview preparation assistant. Help users prepare for job interviews by:
+1. Providing thoughtful answers to interview questions
+2. Giving feedback on responses
+3. Offering tips and best practices
+4. Role-playing as an interviewer when needed
+
+Be encouraging, professional, and provide actionable advice."""
+
+CHAT_SUMMARY_PROMPT = """You keep running notes on an interview practice chat between a candidate and a career coach.
+Merge the new turns into the existing notes. Keep the questions practised, the candidate's answers and weak points,
+and the advice given. Write terse notes, not a transcript."""
+
+def summarize_chat(summary, turns, max_tokens):
+    """Fold older chat turns into the session's running summary."""
+    transcript = "\n".join(
+        f"{'Candidate' if turn['role'] == 'user' else 'Coach'}: {turn['content']}" for turn in turns
+    )
+    response = LLM.create(
+        model="gpt-3.5-turbo",
+        timeout=CHAT_SUMMARY_TIMEOUT,
+        messages=[
+            {"role": "system", "content": CHAT_SUMMARY_PROMPT},
+            {"role": "user", "content": f"Existing notes:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+        ],
+        max_tokens=max_tokens,
+        temperature=0.2
+    )
+    metrics.record_llm_usage("gpt-3.5-turbo", response)
+    return response.choices[0].message.content.strip()
+
+def create_chat_session_backend():
+    """Shared SQLite store by default; the next turn may reach any worker."""
+    max_entries = int(os.getenv("CHAT_SESSION_MAX_ENTRIES", "5000"))
+    backend = os.getenv("CHAT_SESSION_BACKEND", "sqlite")
+    if backend == "sqlite":
+        return SqliteBackend(os.getenv("CHAT_SESSION_PATH", "data/chat_sessions.sqlite3"), max_entries=max_entries)
+    if backend != "memory":
+        raise ValueError(f"Unknown chat session backend: {backend}")
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        raise ValueError("CHAT_SESSION_BACKEND=memory only works with a single worker (WEB_CONCURRENCY=1)")
+    return MemoryBackend(max_entries=max_entries)
+
+CHAT_SESSIONS = ChatSessions(
+    create_chat_session_backend(),
+    summarize_chat,
+    ttl=CHAT_SESSION_TTL,
+    history_tokens=CHAT_HISTORY_TOKENS,
+    summary_tokens=CHAT_SUMMARY_TOKENS
+)
+
+def stream_chat(stream, session_id, message):
+    """Emit chat tokens as SSE events as they arrive"""
+    parts = []
+    try:
+        for delta in iter_completion_text(stream):
+            parts.append(delta)
+            yield sse_event("token", {"delta": delta})
+        reply = ''.join(parts).strip()
+        CHAT_SESSIONS.record(session_id, message, reply)
+        yield sse_event("done", {"success": True, "response": reply, "session_id": session_id})
+    except Exception as e:
+        logger.error("Error streaming chat: %s", e)
+        yield sse_event("error", {"success": False, "message": str(e)})
+    finally:
+        stream.close()
+
 @application.route('/chat', methods=['POST'])
 def chat():
-    """Handle chat conversations for interview prep."""
+    """Handle chat conversations for interview prep.
+
+    Send ``context`` (JD, CV, skills) with the first message and keep the
+    returned ``session_id``; later messages need only ``message`` and
+    ``session_id``. Sending ``context`` again replaces the stored context.
+    """
     try:
         data = request.get_json()
         message = data.get('message', '')
-        context = data.get('context', '')
+        context = data.get('context')
+        session_id = data.get('session_id')
         
         if not message:
             return jsonify({"success": False, "message": "Message required"}), 400
-        
-        # Create conversation prompt
-        system_prompt = """You are an expert career coach and interview preparation assistant. Help users prepare for job interviews by:
-1. Providing thoughtful answers to interview questions
-2. Giving feedback on responses
-3. Offering tips and best practices
-4. Role-playing as an interviewer when needed
-
-Be encouraging, professional, and provide actionable advice."""
 
-        user_prompt = f"{context}Question/Message: {message}"
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=800,
-            temperature=0.8
-        )
+        session = CHAT_SESSIONS.get(session_id)
+        if session_id and session is None and context is None:
+            return jsonify({
+                "success": False,
+                "message": "Chat session not found or expired",
+                "session_expired": True
+            }), 404
+        if context is not None:
+            context = compact_for_prompt(context, CHAT_CONTEXT_TOKENS, "chat_context")
+        if session is None:
+            session = CHAT_SESSIONS.create(context or "")
+        elif context is not None:
+            CHAT_SESSIONS.set_context(session, context)
         
+        with metrics.span("openai"):
+            response = LLM.create(
+                model="gpt-3.5-turbo",
+                messages=CHAT_SESSIONS.messages(session, CHAT_SYSTEM_PROMPT, message),
+                max_tokens=800,
+                temperature=0.8,
+                stream=wants_stream(data)
+            )
+        metrics.record_llm_usage("gpt-3.5-turbo", response)
+
+        if wants_stream(data):
+            return sse_response(stream_chat(response, session["id"], message))
+
+        reply = response.choices[0].message.content.strip()
+        CHAT_SESSIONS.record(session["id"], message, reply)
         return jsonify({
             "success": True,
-            "response": response.choices[0].message.content.strip()
+            "response": reply,
+            "session_id": session["id"]
         })
         
+    except (LLMBusyError, LLMDeadlineError) as e:
+        return llm_unavailable_response(e, {"success": False, "message": str(e)})
     except Exception as e:
-        logger.error(f"Error in chat: {e}")
+        logger.error("Error in chat: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+@application.route('/courses/search', methods=['GET'])
+def search_courses():
+    """Search the course catalogue for a skill or topic.
+
+    Query parameters: ``q``, ``limit``, ``min_score`` and any number of
+    ``department`` course-number prefixes such as ``CS F``.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"success": False, "message": "Query required"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', COURSE_MATCH_TOP_K)), COURSE_SEARCH_MAX_LIMIT))
+        min_score = float(request.args.get('min_score', 0.0))
+    except ValueError:
+        return jsonify({"success": False, "message": "limit and min_score must be numbers"}), 400
+    departments = [prefix for value in request.args.getlist('department') for prefix in value.split(',') if prefix.strip()]
+
+    index = load_course_index()
+    if index is None:
+        return jsonify({"success": False, "message": "Course catalogue unavailable"}), 503
+    matches = match_courses(index, [query], limit, min_score, departments)[0]
+    return jsonify({"success": True, "results": [index.course(row, score) for row, score in matches]})
+
+
+@application.route('/chat/sessions/<session_id>', methods=['DELETE'])
+def end_chat_session(session_id):
+    """Forget a chat session and its stored context."""
+    CHAT_SESSIONS.delete(session_id)
+    return jsonify({"success": True})
+
+
 @application.route('/analyze', methods=['POST'])
 def analyze():
     """Compare CV against job description."""
@@ -509,18 +1197,137 @@ def analyze():
         return jsonify({'error': 'Missing data'}), 400
 
     try:
-        job_description = extract_text_from_pdf(jd_file)
-        cv_text = extract_text_from_pdf(cv_file)
+        job_description, cv_text = extract_texts_from_pdfs([jd_file, cv_file])
+    except PdfLimitError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 413
+    except NotPdfError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 415
+    except PdfTimeoutError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 504
     except Exception as e:
-        logger.error(f"Error processing files: {e}")
+        logger.error("Error processing files: %s", e)
         return jsonify({'error': f"Error processing files: {str(e)}"}), 500
 
     try:
         feedback = compare_with_gpt_for_non_immediate_interview(job_description, cv_text)
         return jsonify({'feedback': feedback}), 200
+    except (LLMBusyError, LLMDeadlineError) as e:
+        return llm_unavailable_response(e, {'error': f"Error during analysis: {str(e)}"})
+    except Exception as e:
+        logger.error("Error during analysis: %s", e)
+        return jsonify({'error': f"Error during analysis: {str(e)}"}), 500
+
+@application.route('/analyze/jobs', methods=['POST'])
+def submit_analysis_job():
+    """Queue a CV vs job description comparison and return its job id immediately."""
+    jd_file = request.files.get('job_description')
+    cv_file = request.files.get('cv')
+
+    if not jd_file or not cv_file:
+        logger.error('Missing data: Job description file or CV not provided')
+        return jsonify({'error': 'Missing data'}), 400
+
+    try:
+        job_id = JOB_RUNNER.submit("analyze", {
+            "job_description": jd_file.read(),
+            "cv": cv_file.read()
+        })
+    except PdfLimitError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 413
+    except NotPdfError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 415
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        logger.error("Error queueing analysis job: %s", e)
+        return jsonify({'error': f"Error queueing analysis: {str(e)}"}), 500
+
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f"/analyze/jobs/{job_id}",
+        'events_url': f"/analyze/jobs/{job_id}/events"
+    }), 202
+
+@application.route('/analyze/jobs/<job_id>', methods=['GET'])
+def analysis_job_status(job_id):
+    """Poll the status of a queued analysis."""
+    job = JOB_RUNNER.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_payload(job)), 200
+
+@application.route('/analyze/jobs/<job_id>/events', methods=['GET'])
+def analysis_job_events(job_id):
+    """Stream progress of a queued analysis as server-sent events."""
+    if JOB_RUNNER.status(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        last = None
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT
+        while time.monotonic() < deadline:
+            job = JOB_RUNNER.status(job_id)
+            payload = job_payload(job)
+            if job["status"] in FINISHED:
+                yield sse_event("done", payload)
+                return
+            if (job["status"], job["stage"]) != last:
+                last = (job["status"], job["stage"])
+                yield sse_event("progress", payload)
+            time.sleep(JOB_EVENTS_POLL_INTERVAL)
+        yield sse_event("timeout", {"job_id": job_id, "status_url": f"/analyze/jobs/{job_id}"})
+
+    return sse_response(events())
+
+@application.route('/analyze/bulk', methods=['POST'])
+def analyze_bulk():
+    """Rank many CVs against one job description, or many job descriptions against one CV."""
+    jd_files = request.files.getlist('job_description') + request.files.getlist('job_descriptions')
+    cv_files = request.files.getlist('cv') + request.files.getlist('cvs')
+
+    if len(jd_files) == 1 and cv_files:
+        anchor_file, candidate_files, anchor_is_cv = jd_files[0], cv_files, False
+    elif len(cv_files) == 1 and jd_files:
+        anchor_file, candidate_files, anchor_is_cv = cv_files[0], jd_files, True
+    else:
+        return jsonify({'error': 'Provide one job_description with cvs, or one cv with job_descriptions'}), 400
+
+    if len(candidate_files) > BULK_MAX_FILES:
+        return jsonify({'error': f"At most {BULK_MAX_FILES} documents can be ranked at once"}), 413
+
+    try:
+        shortlist_size = int(request.form.get('shortlist', BULK_SHORTLIST))
+    except ValueError:
+        return jsonify({'error': 'shortlist must be a number'}), 400
+    shortlist_size = max(0, min(shortlist_size, BULK_MAX_SHORTLIST))
+
+    try:
+        anchor_text = extract_text_from_pdf(anchor_file)
+    except PdfLimitError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 413
+    except NotPdfError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 415
+    except PdfTimeoutError as e:
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 504
     except Exception as e:
-        logger.error(f"Error during analysis: {e}")
+        logger.error("Error processing files: %s", e)
+        return jsonify({'error': f"Error processing files: {str(e)}"}), 500
+
+    names = [f.filename or f"document-{i + 1}" for i, f in enumerate(candidate_files)]
+    with metrics.span("bulk_prescore"):
+        texts, errors = BULK_RANKER.extract(candidate_files, lambda upload: upload)
+        ranking = BULK_RANKER.rank(anchor_text, names, texts, errors, shortlist_size)
+
+    if wants_stream(request.form):
+        return sse_response(stream_bulk_ranking(anchor_text, anchor_is_cv, ranking, texts))
+
+    try:
+        results = list(BULK_RANKER.analyze_shortlist(anchor_text, anchor_is_cv, ranking, texts))
+    except Exception as e:
+        logger.error("Error during bulk analysis: %s", e)
         return jsonify({'error': f"Error during analysis: {str(e)}"}), 500
+    return jsonify({'ranking': ranking, 'results': order_bulk_results(results)}), 200
 
 @application.route('/google-auth', methods=['POST'])
 def google_auth():
@@ -545,45 +1352,49 @@ def google_auth():
                 "message": "Access restricted to BITS Pilani students only"
             }), 403
 
-        # Verify the Google token (optional but recommended for security)
+        # Verify the Google token
         try:
-            # Replace with your Google Client ID
-            CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
-            idinfo = id_token.verify_oauth2_token(
-                credential, google_requests.Request(), CLIENT_ID)
-            
-            if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
-                raise ValueError('Wrong issuer.')
-                
+            idinfo = google_verifier.verify(credential)
         except ValueError as e:
-            logger.error(f"Google token verification failed: {e}")
+            logger.error("Google token verification failed: %s", e)
             return jsonify({
                 "success": False, 
                 "message": "Invalid Google token"
             }), 401
 
+        # The token, not the request body, says who is signing in
+        verified_email = idinfo.get("email") or ""
+        if not idinfo.get("email_verified") or verified_email.lower() != email.lower():
+            logger.warning("Google token email does not match the requested email: %s", email)
+            return jsonify({
+                "success": False,
+                "message": "Invalid Google token"
+            }), 401
+        email = verified_email
+
         # Check if user exists
-        existing_student = db.collection("students").where("email", "==", email).limit(1).get()
+        student_doc = students.find_by_email(email)
         
-        if existing_student:
+        if student_doc:
             # User exists, update Google ID if not set
-            student_doc = existing_student[0]
             student_data = student_doc.to_dict()
             
             if not student_data.get('googleId'):
-                db.collection("students").document(student_doc.id).update({
+                students.update(student_doc.id, email, {
                     'googleId': google_id
                 })
             
-            logger.info(f"Google login successful: {email}")
+            logger.info("Google login successful: %s", email)
+            student = {
+                "id": student_doc.id,
+                "name": student_data.get("name"),
+                "email": student_data.get("email")
+            }
             return jsonify({
                 "success": True,
                 "message": "Login successful",
-                "student": {
-                    "id": student_doc.id,
-                    "name": student_data.get("name"),
-                    "email": student_data.get("email")
-                }
+                "student": student,
+                "token": session_tokens.issue(student)
             }), 200
         else:
             # Create new user
@@ -592,30 +1403,32 @@ def google_auth():
                 "email": email,
                 "googleId": google_id,
                 "password": None,  # No password for Google OAuth users
-                "createdAt": firestore.SERVER_TIMESTAMP
+                "createdAt": server_timestamp()
             }
             
-            doc_ref = db.collection("students").add(new_student)
+            doc_ref = students.add(new_student)
             
-            logger.info(f"New Google user registered: {email}")
+            logger.info("New Google user registered: %s", email)
+            student = {
+                "id": doc_ref[1].id,
+                "name": name,
+                "email": email
+            }
             return jsonify({
                 "success": True,
                 "message": "Account created and login successful",
-                "student": {
-                    "id": doc_ref[1].id,
-                    "name": name,
-                    "email": email
-                }
+                "student": student,
+                "token": session_tokens.issue(student)
             }), 201
 
     except Exception as e:
-        logger.error(f"Error in Google authentication: {e}")
+        logger.error("Error in Google authentication: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
 
 # Run app
 if __name__ == '__main__':
     print(f"🚀 Starting BITS Pilani Job Matching System...")
-    print(f"🔥 Firestore status: {'✅ Connected' if db else '❌ Failed'}")
+    print(f"🔥 Firestore status: {'✅ Connected' if get_db() else '❌ Failed'}")
     print(f"🌐 CORS enabled for: {ALLOWED_ORIGINS}")
     application.run(debug=True, host='127.0.0.1', port=5000)
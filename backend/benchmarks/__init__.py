@@ -0,0 +1,9 @@
+"""Offline benchmark and load-test suite for the backend.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.run            # startup, microbenchmarks and load test
+    python -m benchmarks.run startup
+    python -m benchmarks.run micro
+    python -m benchmarks.run load --concurrency 16 --requests 200
+"""
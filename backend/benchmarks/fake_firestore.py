@@ -0,0 +1,81 @@
+"""In-memory stand-in for the parts of the Firestore client the app uses."""
+import threading
+import time
+import uuid
+
+
+class FakeDocument:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeDocumentRef:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def update(self, fields):
+        with self._collection.lock:
+            self._collection.docs[self.id].update(fields)
+
+
+class FakeQuery:
+    def __init__(self, collection, field, value):
+        self._collection = collection
+        self._field = field
+        self._value = value
+        self._limit = None
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def get(self):
+        time.sleep(self._collection.latency)
+        with self._collection.lock:
+            matches = [
+                FakeDocument(doc_id, data) for doc_id, data in self._collection.docs.items()
+                if data.get(self._field) == self._value
+            ]
+        return matches[:self._limit] if self._limit is not None else matches
+
+
+class FakeCollection:
+    def __init__(self, latency):
+        self.latency = latency
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def where(self, field, op, value):
+        if op != "==":
+            raise NotImplementedError(f"Unsupported operator: {op}")
+        return FakeQuery(self, field, value)
+
+    def document(self, doc_id):
+        return FakeDocumentRef(self, doc_id)
+
+    def add(self, data):
+        doc_id = uuid.uuid4().hex
+        time.sleep(self.latency)
+        with self.lock:
+            self.docs[doc_id] = dict(data)
+        return time.time(), FakeDocumentRef(self, doc_id)
+
+
+class FakeFirestore:
+    """Firestore client fake with optional per-call latency."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = FakeCollection(self.latency)
+            return self._collections[name]
@@ -0,0 +1,114 @@
+"""Wire the app to local fakes so benchmarks run without network access.
+
+``load_application`` must run before anything else imports ``application``:
+the OpenAI client and the cache/job stores read their settings from the
+environment at import time.
+"""
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from .fake_firestore import FakeFirestore
+from .stub_openai import StubOpenAIServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def benchmark_env(base_url, cold=False):
+    """Environment for an app process talking to the stub at ``base_url``.
+
+    Job, cache and log files go to a scratch directory. With ``cold`` the PDF,
+    LLM response and link caches and the question bank are disabled so every
+    request pays for the full pipeline.
+    """
+    scratch = tempfile.mkdtemp(prefix="job-match-bench-")
+    env = {
+        "OPENAI_API_KEY": "sk-benchmark",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "JOB_DB_PATH": os.path.join(scratch, "jobs.sqlite3"),
+        "LLM_CACHE_PATH": os.path.join(scratch, "llm_cache.sqlite3"),
+        "QUESTION_BANK_PATH": os.path.join(scratch, "question_bank.sqlite3"),
+        "CHAT_SESSION_PATH": os.path.join(scratch, "chat_sessions.sqlite3"),
+        "SESSION_SECRET": "benchmark-secret",
+        "LOG_LEVEL": os.getenv("BENCHMARK_LOG_LEVEL", "WARNING"),
+        "LOG_FILE": os.path.join(scratch, "app.log"),
+    }
+    if cold:
+        env.update({"PDF_CACHE_MEMORY_BYTES": "0", "LLM_CACHE_TTL": "0", "LINK_CACHE_GOOD_TTL": "0",
+                    "QUESTION_BANK": "0"})
+    return env
+
+
+def load_application(stub, cold=False, firestore_latency=0.0):
+    """Import the app against ``stub`` with scratch stores and a fake Firestore."""
+    env = benchmark_env(stub.base_url, cold=cold)
+    os.environ.update(env)
+    os.environ.pop("PDF_CACHE_DIR", None)
+
+    # Relative data paths in the app resolve against the backend directory
+    os.chdir(BACKEND_DIR)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+    import application
+    # Keep werkzeug's per-request access log out of benchmark output
+    logging.getLogger("werkzeug").setLevel(env["LOG_LEVEL"])
+    application.db = FakeFirestore(latency=firestore_latency)
+    return application
+
+
+def start_stub(latency, rate_limit_ratio=0.0):
+    return StubOpenAIServer(latency=latency, rate_limit_ratio=rate_limit_ratio).start()
+
+
+def summarize(samples, elapsed=None):
+    """Latency percentiles in milliseconds, plus throughput when ``elapsed`` is given."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def pct(p):
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[index] * 1000
+
+    summary = {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+    if elapsed:
+        summary["rps"] = len(ordered) / elapsed
+    return summary
+
+
+def timeit(func, repeat, warmup=1):
+    """Run ``func`` ``warmup`` times untimed, then return ``repeat`` timings."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def print_table(title, rows):
+    """Print ``rows`` of (name, summary) as an aligned table."""
+    print(f"\n{title}")
+    columns = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "rps", "errors"]
+    present = [c for c in columns if any(c in summary for _, summary in rows)]
+    width = max(len(name) for name, _ in rows) + 2
+    print("".ljust(width) + "".join(c.rjust(10) for c in present))
+    for name, summary in rows:
+        cells = []
+        for column in present:
+            value = summary.get(column, "")
+            cells.append((f"{value:.2f}" if isinstance(value, float) else str(value)).rjust(10))
+        print(name.ljust(width) + "".join(cells))
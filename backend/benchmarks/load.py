@@ -0,0 +1,114 @@
+"""Fixed-concurrency load test against the app served over real HTTP."""
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from .harness import print_table, summarize
+from .micro import SKILL_SETS
+from .pdfs import SIZES, generate_pdf
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "benchmark-password"
+
+
+class AppServer:
+    """Serve the Flask app from a background thread on a free port."""
+
+    def __init__(self, app):
+        self._server = make_server("127.0.0.1", 0, app.application, threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+
+
+def build_scenarios(pdf_size):
+    """Map scenario name to a function issuing one request with a session."""
+    pages = SIZES[pdf_size]
+    jd_pdf = generate_pdf(pages, seed=1)
+    cv_pdf = generate_pdf(pages, seed=2)
+    questions_body = {
+        "jobDescription": "Backend engineer building data pipelines with Python, SQL and Docker.",
+        "cvText": "Built ETL services in Python and SQL; deployed with Docker and Kubernetes.",
+        "skillsFound": ["Python", "SQL"],
+        "skillsMissing": SKILL_SETS["8 skills"]
+    }
+
+    return {
+        "GET /": lambda s, url: s.get(f"{url}/"),
+        "POST /login": lambda s, url: s.post(
+            f"{url}/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+        ),
+        "POST /generate-questions": lambda s, url: s.post(f"{url}/generate-questions", json=questions_body),
+        "POST /chat": lambda s, url: s.post(
+            f"{url}/chat", json={"message": "How should I answer a system design question?"}
+        ),
+        f"POST /analyze ({pdf_size})": lambda s, url: s.post(f"{url}/analyze", files={
+            "job_description": ("jd.pdf", jd_pdf, "application/pdf"),
+            "cv": ("cv.pdf", cv_pdf, "application/pdf")
+        }),
+    }
+
+
+def run_scenario(base_url, send, concurrency, total):
+    """Issue ``total`` requests from ``concurrency`` threads; return (samples, errors, elapsed)."""
+    samples = []
+    errors = [0]
+    remaining = [total]
+    lock = threading.Lock()
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                ok = send(session, base_url).status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append(elapsed)
+                if not ok:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, errors[0], time.perf_counter() - started
+
+
+def run(app, concurrency=8, total=100, pdf_size="small", only=None):
+    # Seed the account the login scenario signs in with
+    app.students.add({"name": "Bench", "email": BENCH_EMAIL, "password": app.passwords.hash(BENCH_PASSWORD)})
+
+    rows = []
+    with AppServer(app) as server:
+        for name, send in build_scenarios(pdf_size).items():
+            if only and not any(part in name for part in only):
+                continue
+            # One untimed request warms connections and lazy state
+            send(requests.Session(), server.base_url)
+            samples, errors, elapsed = run_scenario(server.base_url, send, concurrency, total)
+            summary = summarize(samples, elapsed)
+            summary["errors"] = errors
+            rows.append((name, summary))
+
+    print_table(f"Load test: {total} requests per route at concurrency {concurrency} (ms, req/s)", rows)
+    return rows
@@ -0,0 +1,62 @@
+"""Microbenchmarks for the request hot paths, called in-process."""
+import io
+
+from .harness import print_table, summarize, timeit
+from .pdfs import SIZES, generate_pdf
+from .stub_openai import CANNED_QUESTIONS
+
+SKILL_SETS = {
+    "8 skills": ["Machine Learning", "Docker", "Kubernetes", "React.js", "Statistics",
+                 "Cloud computing", "Data structures", "Operating systems"],
+}
+SKILL_SETS["40 skills"] = [f"{skill} {n}" for n in range(5) for skill in SKILL_SETS["8 skills"]]
+
+
+def bench_pdf_extraction(app, repeat):
+    rows = []
+    for name, pages in SIZES.items():
+        data = generate_pdf(pages, seed=pages)
+
+        def cold():
+            app.PDF_TEXT_CACHE.clear()
+            app.extract_text_from_pdf(io.BytesIO(data))
+
+        rows.append((f"extract {name} ({pages}p) cold", summarize(timeit(cold, repeat))))
+        rows.append((
+            f"extract {name} ({pages}p) cached",
+            summarize(timeit(lambda: app.extract_text_from_pdf(io.BytesIO(data)), repeat))
+        ))
+    return rows
+
+
+def bench_course_matching(app, repeat):
+    index = app.load_course_index()
+    rows = []
+    for name, skills in SKILL_SETS.items():
+        rows.append((f"find_similar_courses {name}", summarize(timeit(lambda: app.find_similar_courses(skills), repeat))))
+        rows.append((f"  tfidf top_k {name}", summarize(timeit(lambda: index.top_k(skills, k=3), repeat))))
+        rows.append((
+            f"  bm25 top_k {name}",
+            summarize(timeit(lambda: index.search.top_k(skills, k=3, synonyms=app.SKILL_SYNONYMS), repeat))
+        ))
+    return rows
+
+
+def bench_question_parsing(app, repeat):
+    lines = CANNED_QUESTIONS.splitlines()
+    cues = SKILL_SETS["8 skills"]
+
+    def parse():
+        questions = [q for q in map(app.parse_question_line, lines) if q]
+        return [app.tag_question(q, cues) for q in questions][:app.QUESTION_LIMIT]
+
+    return [("generate-questions parsing", summarize(timeit(parse, repeat * 10)))]
+
+
+def run(app, repeat=20):
+    rows = []
+    rows += bench_pdf_extraction(app, repeat)
+    rows += bench_course_matching(app, repeat)
+    rows += bench_question_parsing(app, repeat)
+    print_table("Microbenchmarks (ms)", rows)
+    return rows
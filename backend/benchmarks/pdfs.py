@@ -0,0 +1,74 @@
+"""Generate text PDFs of a given size for benchmarks.
+
+PyPDF2 can't lay out text, so this writes a minimal PDF by hand: one
+Helvetica font and one content stream of text lines per page.
+"""
+import random
+
+SKILLS = [
+    "Python", "SQL", "Docker", "Kubernetes", "React.js", "Machine Learning", "AWS",
+    "Flask", "PostgreSQL", "Data pipelines", "REST APIs", "CI/CD", "Statistics",
+    "TensorFlow", "Linux", "Git", "Airflow", "Spark", "Java", "C++"
+]
+
+SECTIONS = ["EXPERIENCE", "PROJECTS", "SKILLS", "EDUCATION", "RESPONSIBILITIES", "REQUIREMENTS"]
+
+LINES_PER_PAGE = 45
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def sample_lines(count, seed=0):
+    """Return ``count`` plausible resume/JD lines."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        if i % 15 == 0:
+            lines.append(rng.choice(SECTIONS))
+        else:
+            skills = ", ".join(rng.sample(SKILLS, 3))
+            lines.append(f"- Built and maintained services using {skills} for {rng.randint(2, 40)} teams")
+    return lines
+
+
+def build_pdf(pages):
+    """Return PDF bytes for ``pages``, a list of lists of text lines."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font_id = 3 + 2 * len(pages)
+
+    for i, lines in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        text = " ".join(f"({_escape(line)}) '" for line in lines)
+        stream = f"BT /F1 10 Tf 40 760 Td 16 TL {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def generate_pdf(page_count, seed=0):
+    """Return PDF bytes with ``page_count`` pages of generated text."""
+    lines = sample_lines(page_count * LINES_PER_PAGE, seed=seed)
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    return build_pdf(pages)
+
+
+# Named sizes used by the benchmarks
+SIZES = {"small": 1, "medium": 4, "large": 20}
@@ -0,0 +1,55 @@
+"""Command line entry point: ``python -m benchmarks.run [startup|micro|load|all]``."""
+import argparse
+
+from . import load, micro, startup
+from .harness import load_application, start_stub
+from .pdfs import SIZES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the job match backend")
+    parser.add_argument("suite", nargs="?", choices=["startup", "micro", "load", "all"], default="all")
+    parser.add_argument("--openai-latency", type=float, default=0.2,
+                        help="Seconds the stub OpenAI server waits before answering")
+    parser.add_argument("--openai-429-ratio", type=float, default=0.0,
+                        help="Share of stub OpenAI requests answered with a 429")
+    parser.add_argument("--firestore-latency", type=float, default=0.01,
+                        help="Seconds each fake Firestore call takes")
+    parser.add_argument("--cold", action="store_true",
+                        help="Disable PDF, LLM response and link caches")
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per microbenchmark")
+    parser.add_argument("--import-repeat", type=int, default=5, help="Fresh processes timed per startup scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent load test clients")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per route in the load test")
+    parser.add_argument("--pdf-size", choices=sorted(SIZES), default="small",
+                        help="Size of the PDFs uploaded to /analyze")
+    parser.add_argument("--route", action="append",
+                        help="Only load test routes containing this text (repeatable)")
+    args = parser.parse_args()
+
+    if args.suite in ("startup", "all"):
+        # Runs in subprocesses, before this process imports the app
+        startup.run(repeat=args.import_repeat)
+    if args.suite == "startup":
+        return
+
+    stub = start_stub(args.openai_latency, rate_limit_ratio=args.openai_429_ratio)
+    app = None
+    try:
+        app = load_application(stub, cold=args.cold, firestore_latency=args.firestore_latency)
+        if args.suite in ("micro", "all"):
+            micro.run(app, repeat=args.repeat)
+        if args.suite in ("load", "all"):
+            load.run(app, concurrency=args.concurrency, total=args.requests,
+                     pdf_size=args.pdf_size, only=args.route)
+        print(f"\nStub OpenAI requests served: {stub.requests} ({stub.rate_limited} rate limited)")
+        for model, stats in app.LLM.stats().items():
+            print(f"  {model}: {stats}")
+    finally:
+        if app is not None:
+            app.PDF_EXTRACTOR.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Import-time benchmark: how long a fresh worker takes to import the app."""
+import os
+import re
+import subprocess
+import sys
+
+from .harness import BACKEND_DIR, benchmark_env, print_table, summarize
+
+IMPORT_SCRIPT = (
+    "import time; started = time.perf_counter(); import application; "
+    "print(time.perf_counter() - started)"
+)
+
+SCENARIOS = {
+    "import application": {},
+    "import application (lazy index)": {"PRELOAD_COURSE_INDEX": "0"},
+}
+
+
+def _import_env(extra):
+    env = dict(os.environ)
+    # Nothing is requested during import, so the stub doesn't need to be running
+    env.update(benchmark_env("http://127.0.0.1:9"))
+    env.update(extra)
+    env.pop("PDF_CACHE_DIR", None)
+    return env
+
+
+def slowest_imports(extra=None, limit=10):
+    """Modules application imports, by cumulative import time, from ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import application"],
+        cwd=BACKEND_DIR, env=_import_env(extra or {}), capture_output=True, text=True, check=True
+    )
+    totals = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$", line)
+        # Two spaces of indent: imported directly by application
+        if match and len(match.group(2)) == 2:
+            totals[match.group(3)] = int(match.group(1)) / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def run(repeat=5):
+    rows = []
+    for name, extra in SCENARIOS.items():
+        samples = []
+        for _ in range(repeat):
+            result = subprocess.run(
+                [sys.executable, "-c", IMPORT_SCRIPT],
+                cwd=BACKEND_DIR, env=_import_env(extra), capture_output=True, text=True, check=True
+            )
+            samples.append(float(result.stdout.strip().splitlines()[-1]))
+        rows.append((name, summarize(samples)))
+    print_table(f"Startup: application import time over {repeat} fresh processes (ms)", rows)
+
+    print("\nSlowest imports (lazy index, ms):")
+    for module, seconds in slowest_imports(SCENARIOS["import application (lazy index)"]):
+        print(f"  {module:<40}{seconds * 1000:10.1f}")
+    return rows
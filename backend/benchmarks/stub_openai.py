@@ -0,0 +1,168 @@
+"""Local OpenAI-compatible stand-in for benchmarks.
+
+Serves ``POST /v1/chat/completions`` with canned answers chosen from the
+prompt, including streamed responses, after a configurable latency. A share
+of requests can be answered with 429s to exercise retry and load shedding. ``HEAD``
+requests to any path answer 200, so course links in the canned analysis can
+point back at this server and link validation stays offline.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_QUESTIONS = "\n".join(
+    f"{i}. How did you apply {skill} in your project to meet the JD's delivery targets?"
+    for i, skill in enumerate(
+        ["Python", "SQL", "Docker", "Kubernetes", "React.js", "Machine Learning",
+         "AWS", "CI/CD", "REST APIs", "Data pipelines"],
+        start=1
+    )
+)
+
+CANNED_CHAT = (
+    "Great question. Structure your answer with the STAR method: describe the "
+    "situation, the task, the actions you took and the measurable result."
+)
+
+
+def canned_analysis(base_url):
+    return json.dumps({
+        "match_percentage": 72,
+        "similarities": ["Python", "SQL", "REST APIs"],
+        "missing": ["Machine Learning", "Docker", "Kubernetes", "React.js", "Statistics",
+                    "Cloud computing", "Data structures", "Operating systems"],
+        "course_recommendations": [
+            {"name": f"Course {i}", "url": f"{base_url}/courses/{i}"} for i in range(6)
+        ]
+    })
+
+
+class StubOpenAIServer:
+    """Threaded stub server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, latency=0.2, stream_chunk_delay=0.005, rate_limit_ratio=0.0,
+                 retry_after=0.2, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.stream_chunk_delay = stream_chunk_delay
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests += 1
+                if random.random() < stub.rate_limit_ratio:
+                    stub.rate_limited += 1
+                    self._rate_limited()
+                    return
+                time.sleep(stub.latency)
+                text = stub.answer(body)
+                if body.get("stream"):
+                    self._stream(body, text)
+                else:
+                    self._complete(body, text)
+
+            def _rate_limited(self):
+                payload = json.dumps({"error": {
+                    "message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"
+                }}).encode()
+                self.send_response(429)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Retry-After", str(stub.retry_after))
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _complete(self, body, text):
+                payload = json.dumps({
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4,
+                        "completion_tokens": len(text) // 4,
+                        "total_tokens": 0
+                    }
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body, text):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for start in range(0, len(text), 16):
+                    chunk = json.dumps({
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{"index": 0, "delta": {"content": text[start:start + 16]},
+                                     "finish_reason": None}]
+                    })
+                    self._write_chunk(f"data: {chunk}\n\n".encode())
+                    time.sleep(stub.stream_chunk_delay)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def answer(self, body):
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        if "Analyze the match" in prompt:
+            return canned_analysis(self.base_url)
+        if "interview questions" in prompt:
+            return CANNED_QUESTIONS
+        return CANNED_CHAT
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,152 @@
+"""Rank many CVs against one job description (or one CV against many JDs).
+
+Every document is scored locally first: a TF-IDF cosine similarity against
+the anchor document plus the share of the anchor's top keywords each
+candidate mentions. Only the best few candidates are then sent for a full
+GPT analysis, on a shared pool that caps how many run at once, so the LLM
+cost of a batch depends on the shortlist size rather than the batch size.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+# How many of the anchor's highest-weighted terms count as its keywords
+TOP_KEYWORDS = 25
+
+# Weight of TF-IDF similarity in the pre-score; the rest is keyword coverage
+SIMILARITY_WEIGHT = 0.6
+
+
+def prescore(anchor_text, candidate_texts, top_keywords=TOP_KEYWORDS):
+    """Score each candidate text against the anchor, in input order.
+
+    Returns dicts with ``score``, ``similarity``, ``keyword_coverage`` and
+    ``matched_keywords``. Candidates given as None score None.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    present = [i for i, text in enumerate(candidate_texts) if text]
+    results = [None] * len(candidate_texts)
+    if not present or not anchor_text.strip():
+        return results
+
+    vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), sublinear_tf=True)
+    try:
+        matrix = vectorizer.fit_transform([anchor_text] + [candidate_texts[i] for i in present]).tocsr()
+    except ValueError:
+        # Only stop words or no text at all; nothing to score on
+        return [None if text is None else _score(0.0, [], 0) for text in candidate_texts]
+
+    anchor = matrix[0]
+    candidates = matrix[1:]
+    # Rows are L2-normalised, so the dot product is the cosine similarity
+    similarities = (candidates @ anchor.T).toarray().ravel()
+
+    terms = vectorizer.get_feature_names_out()
+    weights = anchor.toarray().ravel()
+    keyword_columns = [column for column in weights.argsort()[::-1][:top_keywords] if weights[column] > 0]
+    keyword_matrix = candidates[:, keyword_columns].toarray() if keyword_columns else None
+
+    for row, i in enumerate(present):
+        matched = [] if keyword_matrix is None else [
+            str(terms[column]) for column, weight in zip(keyword_columns, keyword_matrix[row]) if weight > 0
+        ]
+        results[i] = _score(float(similarities[row]), matched, len(keyword_columns))
+    return results
+
+
+def _score(similarity, matched_keywords, keyword_count):
+    coverage = len(matched_keywords) / keyword_count if keyword_count else 0.0
+    return {
+        "score": round(SIMILARITY_WEIGHT * similarity + (1 - SIMILARITY_WEIGHT) * coverage, 4),
+        "similarity": round(similarity, 4),
+        "keyword_coverage": round(coverage, 4),
+        "matched_keywords": matched_keywords,
+    }
+
+
+class BulkRanker:
+    """Extract, pre-score and shortlist a batch, then analyze the shortlist.
+
+    ``extract_batch(files)`` turns a list of file-like objects into texts and
+    ``analyze(job_description, cv_text)`` returns the full GPT feedback for
+    one pair; both are the app's existing single-pair functions.
+    """
+
+    def __init__(self, extract_batch, analyze, max_concurrency=4, batch_size=8):
+        self.extract_batch = extract_batch
+        self.analyze = analyze
+        self.batch_size = batch_size
+        # Shared by every bulk request in the process, so concurrent batches
+        # together never run more than max_concurrency analyses at once
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="bulk-gpt")
+
+    def extract(self, documents, file_factory):
+        """Return ``(texts, errors)`` for ``documents``, in order.
+
+        ``file_factory(document)`` returns the file object to extract from.
+
+        Documents go through ``extract_batch`` a few at a time so the per-batch
+        deadline stays meaningful; a batch that fails is retried one document
+        at a time so one bad PDF only fails itself.
+        """
+        texts = [None] * len(documents)
+        errors = [None] * len(documents)
+        for start in range(0, len(documents), self.batch_size):
+            batch = range(start, min(start + self.batch_size, len(documents)))
+            try:
+                for i, text in zip(batch, self.extract_batch([file_factory(documents[i]) for i in batch])):
+                    texts[i] = text
+            except Exception:
+                for i in batch:
+                    try:
+                        texts[i] = self.extract_batch([file_factory(documents[i])])[0]
+                    except Exception as e:
+                        errors[i] = str(e)
+        return texts, errors
+
+    def rank(self, anchor_text, names, texts, errors, shortlist_size):
+        """Pre-score every candidate and mark the top ``shortlist_size``."""
+        scores = prescore(anchor_text, texts)
+        ranking = []
+        for i, name in enumerate(names):
+            entry = {"index": i, "name": name}
+            if scores[i] is not None:
+                entry.update(scores[i])
+            else:
+                entry.update({"score": None, "error": errors[i] or "No text could be extracted"})
+            ranking.append(entry)
+
+        # Scored candidates first, best first; upload order breaks ties
+        ranking.sort(key=lambda entry: (entry["score"] is None, -(entry["score"] or 0.0), entry["index"]))
+        for rank, entry in enumerate(ranking, start=1):
+            entry["rank"] = rank
+            entry["shortlisted"] = entry["score"] is not None and rank <= shortlist_size
+        return ranking
+
+    def analyze_shortlist(self, anchor_text, anchor_is_cv, ranking, texts):
+        """Yield one result per shortlisted candidate, in completion order."""
+        futures = {}
+        for entry in ranking:
+            if not entry["shortlisted"]:
+                continue
+            text = texts[entry["index"]]
+            pair = (text, anchor_text) if anchor_is_cv else (anchor_text, text)
+            futures[self._pool.submit(self.analyze, *pair)] = entry
+
+        try:
+            for future in as_completed(futures):
+                entry = futures[future]
+                result = {"rank": entry["rank"], "index": entry["index"], "name": entry["name"],
+                          "score": entry["score"]}
+                try:
+                    result["feedback"] = future.result()
+                except Exception as e:
+                    logger.error("Bulk analysis failed for %s: %s", entry["name"], e)
+                    result["error"] = str(e)
+                yield result
+        finally:
+            # The client went away or the caller stopped early: drop queued work
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,67 @@
+"""Compact, read-only BITS course catalogue.
+
+Course fields are stored as parallel tuples indexed by row, aligned with the
+rows of the course index matrix. Course numbers are interned, and only a
+pre-truncated description snippet is kept, since that is all match results
+return. One catalogue is loaded per process and shared by every request.
+"""
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_COURSES_PATH = os.path.join(BASE_DIR, 'data', 'courses.json')
+
+# Length of the description preview returned with each match
+SNIPPET_LENGTH = 100
+
+
+def make_snippet(description):
+    return description[:SNIPPET_LENGTH] + "..."
+
+
+class Catalogue:
+    """Immutable parallel arrays of course numbers, titles and snippets."""
+
+    __slots__ = ('numbers', 'titles', 'snippets')
+
+    def __init__(self, numbers, titles, snippets):
+        if not len(numbers) == len(titles) == len(snippets):
+            raise ValueError("Catalogue columns must have the same length")
+        object.__setattr__(self, 'numbers', tuple(sys.intern(str(number)) for number in numbers))
+        object.__setattr__(self, 'titles', tuple(titles))
+        object.__setattr__(self, 'snippets', tuple(snippets))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalogue is read-only")
+
+    def __reduce__(self):
+        # Rebuild through __init__ so unpickled numbers are interned again
+        return (Catalogue, (self.numbers, self.titles, self.snippets))
+
+    def __len__(self):
+        return len(self.numbers)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from ``courses.json`` style dicts."""
+        return cls(
+            [record['Course No'] for record in records],
+            [record['Course Title'] for record in records],
+            [make_snippet(record['Description']) for record in records]
+        )
+
+    def course(self, row, score):
+        """Build the response record for one matched course row."""
+        return {
+            "Course No": self.numbers[row],
+            "Course Title": self.titles[row],
+            "Similarity": float(score),
+            "Description and Scope": self.snippets[row]
+        }
+
+
+def read_courses(courses_path=DEFAULT_COURSES_PATH):
+    """Return the raw course records from the catalogue file."""
+    with open(courses_path, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,220 @@
+"""Server-side chat sessions for interview practice.
+
+A session stores the JD/CV context once, the latest turns word for word and
+a running summary of older turns. Each prompt is built from the context,
+the summary and as many recent turns as fit the history budget, so prompts
+stay the same size however long the conversation runs, and the client only
+sends its new message. Turns that no longer fit are folded into the summary
+on a background thread, off the request path.
+
+Sessions are kept in a ``response_cache`` backend. With the SQLite backend,
+every worker on the host can serve the same session; changes to a stored
+session go through the backend's ``update``, so turns recorded by different
+workers at the same time are all kept.
+"""
+import logging
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prompt_compaction import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Role and formatting overhead OpenAI adds to every chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Characters of each folded turn kept when no LLM summary is available
+EXCERPT_LENGTH = 160
+
+
+def turn_tokens(turn):
+    return estimate_tokens(turn["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def excerpt_summary(summary, turns, max_tokens):
+    """Summary built without the LLM: the old summary plus the start of each turn.
+
+    The newest text is kept when the result is over ``max_tokens``.
+    """
+    lines = [summary] if summary else []
+    for turn in turns:
+        speaker = "Candidate" if turn["role"] == "user" else "Coach"
+        content = " ".join(turn["content"].split())
+        if len(content) > EXCERPT_LENGTH:
+            content = content[:EXCERPT_LENGTH].rsplit(" ", 1)[0] + "..."
+        lines.append(f"{speaker}: {content}")
+    text = "\n".join(lines)
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) > limit:
+        text = text[-limit:].split("\n", 1)[-1]
+    return text
+
+
+class ChatSessions:
+    """Create, load and extend chat sessions stored in ``backend``.
+
+    ``summarize(summary, turns, max_tokens)`` returns a new running summary
+    that folds ``turns`` into ``summary``. If it fails, an excerpt of the
+    turns is used instead, so the conversation still carries on.
+    """
+
+    def __init__(self, backend, summarize, ttl=6 * 3600, history_tokens=1200,
+                 summary_tokens=300, max_workers=2):
+        self.backend = backend
+        self.summarize = summarize
+        self.ttl = ttl
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.folds = {"summary": 0, "excerpt": 0}
+        self._folding = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-summary")
+
+    @staticmethod
+    def _key(session_id):
+        return f"chat-session:{session_id}"
+
+    def _save(self, session):
+        session["updated"] = time.time()
+        # Saving also restarts the expiry, so active sessions never time out
+        self.backend.set(self._key(session["id"]), session, self.ttl)
+
+    def _update(self, session_id, change):
+        """Apply ``change(session)`` to the stored session in one backend transaction.
+
+        ``change`` returns False to leave the session as it is. Returns the
+        updated session, or None if it is gone or was left unchanged.
+        """
+        def apply(session):
+            if session is None or change(session) is False:
+                return None
+            session["updated"] = time.time()
+            return session
+        return self.backend.update(self._key(session_id), apply, self.ttl)
+
+    def get(self, session_id):
+        """Return the session, or None if it never existed or has expired."""
+        if not session_id:
+            return None
+        return self.backend.get(self._key(session_id))
+
+    def create(self, context=""):
+        session = {
+            "id": secrets.token_urlsafe(16),
+            "context": context,
+            "summary": "",
+            "turns": [],
+            # Number of turns already folded into the summary
+            "folded": 0,
+            "created": time.time()
+        }
+        self._save(session)
+        return session
+
+    def set_context(self, session, context):
+        """Replace the stored JD/CV context if it changed."""
+        if context != session["context"]:
+            session["context"] = context
+
+            def replace(stored):
+                stored["context"] = context
+            self._update(session["id"], replace)
+
+    def delete(self, session_id):
+        self.backend.delete(self._key(session_id))
+
+    def history(self, session):
+        """The latest turns that fit the history budget, oldest first."""
+        budget = self.history_tokens
+        kept = []
+        for turn in reversed(session["turns"]):
+            budget -= turn_tokens(turn)
+            if budget < 0:
+                break
+            kept.append(turn)
+        return kept[::-1]
+
+    def messages(self, session, system_prompt, message):
+        """Chat completion messages for the next turn of ``session``."""
+        messages = [{"role": "system", "content": system_prompt}]
+        background = []
+        if session["context"]:
+            background.append(f"Candidate context:\n{session['context']}")
+        if session["summary"]:
+            background.append(f"Summary of the conversation so far:\n{session['summary']}")
+        if background:
+            messages.append({"role": "system", "content": "\n\n".join(background)})
+        messages.extend({"role": turn["role"], "content": turn["content"]} for turn in self.history(session))
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def record(self, session_id, message, reply):
+        """Append one exchange, and fold old turns away once over budget."""
+        def append(session):
+            session["turns"].append({"role": "user", "content": message})
+            session["turns"].append({"role": "assistant", "content": reply})
+
+        session = self._update(session_id, append)
+        if session is None:
+            # Deleted or expired while the reply was being generated
+            return
+        if sum(turn_tokens(turn) for turn in session["turns"]) > self.history_tokens:
+            self._schedule_fold(session_id)
+
+    def _schedule_fold(self, session_id):
+        with self._lock:
+            if session_id in self._folding:
+                return
+            self._folding.add(session_id)
+        self._pool.submit(self._fold, session_id)
+
+    def _fold(self, session_id):
+        try:
+            session = self.get(session_id)
+            if session is None:
+                return
+            turns = session["turns"]
+            # Fold down to half the budget so this runs every few turns, not every turn
+            split, kept_tokens = len(turns), 0
+            while split > 0 and kept_tokens + turn_tokens(turns[split - 1]) <= self.history_tokens // 2:
+                split -= 1
+                kept_tokens += turn_tokens(turns[split])
+            # Turns come in question/answer pairs; never separate them
+            split += split % 2
+            if split == 0:
+                return
+
+            try:
+                summary = self.summarize(session["summary"], turns[:split], self.summary_tokens)
+                kind = "summary"
+            except Exception as e:
+                logger.warning("Chat summary failed, keeping excerpts instead: %s", e)
+                summary = excerpt_summary(session["summary"], turns[:split], self.summary_tokens)
+                kind = "excerpt"
+
+            def fold(current):
+                # Another worker folded this session while we were summarizing
+                if current["folded"] != session["folded"]:
+                    return False
+                # Turns are only ever appended, so the first ``split`` are the ones summarized
+                current["summary"] = summary
+                current["turns"] = current["turns"][split:]
+                current["folded"] += split
+
+            if self._update(session_id, fold) is None:
+                return
+            with self._lock:
+                self.folds[kind] += 1
+            logger.info("Folded %d chat turns into the session summary", split)
+        except Exception as e:
+            logger.error("Error folding chat session: %s", e)
+        finally:
+            with self._lock:
+                self._folding.discard(session_id)
+
+    def stats(self):
+        """Folds applied so far, by how the summary was made, and folds in progress."""
+        with self._lock:
+            return dict(self.folds, folding=len(self._folding))
@@ -0,0 +1,371 @@
+"""Prebuilt TF-IDF index over the BITS course catalogue.
+
+The vectorizer and course matrix are fitted once and written to disk next to
+``data/courses.json``. The saved index is keyed by a hash of the catalogue, so
+it is rebuilt only when the catalogue changes. ``CourseIndexManager`` watches
+the catalogue file while the app runs and swaps in a rebuilt index without a
+restart.
+
+Build the index offline with::
+
+    python course_index.py build
+"""
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+
+from catalogue import DEFAULT_COURSES_PATH, Catalogue, read_courses
+from course_search import CourseSearchIndex
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, 'data', 'course_index.joblib')
+
+# Bump whenever the on-disk layout or the vectorizer settings change
+INDEX_FORMAT_VERSION = 5
+
+# An update may re-vectorize at most this share of the catalogue with the old
+# vocabulary before the vectorizer is fitted again from scratch
+INCREMENTAL_MAX_SHARE = 0.1
+
+_warm_index = None
+
+
+class CourseIndex:
+    """Fitted TF-IDF vectorizer and course matrix for one catalogue version.
+
+    Matrix rows line up with the rows of ``catalogue``, so match results are
+    assembled straight from its arrays. ``stale_rows`` counts rows vectorized
+    by incremental updates since the vectorizer was last fitted. ``search`` is
+    the BM25 keyword index over the same rows.
+    """
+
+    def __init__(self, vectorizer, course_vectors, catalogue_hash, catalogue, corpus_keys=(), stale_rows=0,
+                 search=None):
+        self.vectorizer = vectorizer
+        self.course_vectors = course_vectors
+        self.catalogue_hash = catalogue_hash
+        self.catalogue = catalogue
+        self.corpus_keys = corpus_keys
+        self.stale_rows = stale_rows
+        self.search = search
+
+    def __len__(self):
+        return self.course_vectors.shape[0]
+
+    def top_k(self, queries, k=3, threshold=0.0):
+        """Return the best ``k`` (row, score) pairs per query, best first.
+
+        All queries are transformed together and scored with one sparse
+        product. TF-IDF rows are L2-normalised, so the dot product is the
+        cosine similarity.
+        """
+        if not queries or len(self) == 0:
+            return [[] for _ in queries]
+        import numpy as np
+
+        query_vectors = self.vectorizer.transform(queries)
+        scores = (query_vectors @ self.course_vectors.T).toarray()
+
+        k = max(1, min(k, scores.shape[1]))
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+        matches = []
+        for rows, row_scores in zip(candidates.tolist(), candidate_scores.tolist()):
+            matches.append([
+                (row, score) for row, score in zip(rows, row_scores)
+                if score > 0 and score >= threshold
+            ])
+        return matches
+
+    def course(self, row, score):
+        """Build the response record for one matched course row."""
+        return self.catalogue.course(row, score)
+
+
+def hash_catalogue(courses_path=DEFAULT_COURSES_PATH):
+    """Return the SHA-256 hex digest of the catalogue file."""
+    digest = hashlib.sha256()
+    with open(courses_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_corpus(records):
+    """Combine Course Title with Description for better matching."""
+    return [record['Course Title'] + ' ' + record['Description'] for record in records]
+
+
+def corpus_key(text):
+    """Short digest identifying a course's indexed text, to spot unchanged rows."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def build_index(courses_path=DEFAULT_COURSES_PATH, catalogue_hash=None, records=None):
+    """Fit a fresh index over the catalogue."""
+    # Only needed to fit; loading a saved index doesn't import scikit-learn here
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    catalogue_hash = catalogue_hash or hash_catalogue(courses_path)
+    records = records if records is not None else read_courses(courses_path)
+    corpus = build_corpus(records)
+
+    vectorizer = TfidfVectorizer(
+        stop_words='english',
+        max_features=1000,
+        ngram_range=(1, 2)
+    )
+    course_vectors = vectorizer.fit_transform(corpus).tocsr()
+    logger.info("Built course index over %d courses", course_vectors.shape[0])
+    return CourseIndex(vectorizer, course_vectors, catalogue_hash, Catalogue.from_records(records),
+                       tuple(corpus_key(text) for text in corpus), search=CourseSearchIndex.from_records(records))
+
+
+def update_index(index, records, catalogue_hash):
+    """Re-vectorize only the courses whose text changed, keeping the fitted vocabulary.
+
+    Returns None when too much changed for that to stay accurate (new terms
+    are not in the old vocabulary and document frequencies drift), in which
+    case the caller should fit a new index.
+    """
+    import scipy.sparse as sp
+
+    corpus = build_corpus(records)
+    keys = tuple(corpus_key(text) for text in corpus)
+    old_rows = {key: row for row, key in enumerate(index.corpus_keys)}
+    changed = [i for i, key in enumerate(keys) if key not in old_rows]
+    stale_rows = index.stale_rows + len(changed)
+    if not index.corpus_keys or stale_rows > INCREMENTAL_MAX_SHARE * len(records):
+        return None
+
+    # Stack the old matrix with the new rows, then pick every row in catalogue order
+    stacked = sp.vstack([index.course_vectors, index.vectorizer.transform([corpus[i] for i in changed])]).tocsr()
+    new_rows = {i: len(index) + j for j, i in enumerate(changed)}
+    course_vectors = stacked[[new_rows[i] if i in new_rows else old_rows[key] for i, key in enumerate(keys)]]
+    logger.info("Updated course index: %d of %d courses re-vectorized", len(changed), len(records))
+    # BM25 statistics are cheap to recount, so the keyword index is always rebuilt whole
+    return CourseIndex(index.vectorizer, course_vectors, catalogue_hash, Catalogue.from_records(records),
+                       keys, stale_rows, CourseSearchIndex.from_records(records))
+
+
+def save_index(index, index_path=DEFAULT_INDEX_PATH):
+    """Write the index atomically so concurrent readers never see a partial file."""
+    payload = {
+        'version': INDEX_FORMAT_VERSION,
+        'catalogue_hash': index.catalogue_hash,
+        'vectorizer': index.vectorizer,
+        'course_vectors': index.course_vectors,
+        'catalogue': index.catalogue,
+        'corpus_keys': index.corpus_keys,
+        'stale_rows': index.stale_rows,
+        'search': index.search,
+    }
+    import joblib
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    joblib.dump(payload, tmp_path)
+    os.replace(tmp_path, index_path)
+    logger.info("Saved course index to %s", index_path)
+
+
+def load_index(index_path=DEFAULT_INDEX_PATH, expected_hash=None):
+    """Load a saved index, or return None if it is missing, stale or unreadable."""
+    if not os.path.exists(index_path):
+        return None
+    # Loaded here, not at import, so workers that never touch the index don't pay for it
+    import joblib
+
+    try:
+        payload = joblib.load(index_path)
+    except Exception as e:
+        logger.warning("Could not read course index %s: %s", index_path, e)
+        return None
+
+    if payload.get('version') != INDEX_FORMAT_VERSION:
+        logger.info("Course index format changed, rebuild required")
+        return None
+    if expected_hash is not None and payload.get('catalogue_hash') != expected_hash:
+        logger.info("Course catalogue changed, rebuild required")
+        return None
+
+    return CourseIndex(
+        payload['vectorizer'],
+        payload['course_vectors'],
+        payload['catalogue_hash'],
+        payload['catalogue'],
+        payload['corpus_keys'],
+        payload['stale_rows'],
+        payload['search']
+    )
+
+
+def load_or_build_index(courses_path=DEFAULT_COURSES_PATH, index_path=DEFAULT_INDEX_PATH):
+    """Return the saved index for the current catalogue, rebuilding it if needed."""
+    catalogue_hash = hash_catalogue(courses_path)
+    index = load_index(index_path, expected_hash=catalogue_hash)
+    if index is not None:
+        logger.info("Loaded course index from %s", index_path)
+        return index
+
+    index = build_index(courses_path)
+    try:
+        save_index(index, index_path)
+    except OSError as e:
+        # A read-only deploy still works, it just refits on every start
+        logger.warning("Could not save course index: %s", e)
+    return index
+
+
+class CourseIndexManager:
+    """Serve the current course index and replace it when the catalogue changes.
+
+    ``current()`` never blocks once an index is loaded. At most every
+    ``poll_interval`` seconds it stats the catalogue file; when the mtime or
+    size moved it hashes the file and, if the content really changed, builds
+    the new index on a background thread. Callers keep using the old index
+    until the new one is complete, then the reference is swapped in one
+    assignment, so a lookup always sees one whole index.
+    """
+
+    def __init__(self, courses_path=DEFAULT_COURSES_PATH, index_path=DEFAULT_INDEX_PATH,
+                 poll_interval=30.0, initial=None):
+        self.courses_path = courses_path
+        self.index_path = index_path
+        self.poll_interval = poll_interval
+        self.reloads = {"loaded": 0, "incremental": 0, "full": 0, "failed": 0}
+        self._index = initial
+        # Unknown until first checked, so a change made after warm-up is still seen
+        self._signature = None
+        self._next_check = 0.0
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def current(self):
+        """Return the current index, loading it on first use."""
+        index = self._index
+        if index is None:
+            with self._load_lock:
+                if self._index is None:
+                    self._signature = self._stat()
+                    self._index = load_or_build_index(self.courses_path, self.index_path)
+                index = self._index
+        if self.poll_interval:
+            self.check()
+        return index
+
+    def _stat(self):
+        stat = os.stat(self.courses_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self, force=False):
+        """Start a background refresh if the catalogue file looks changed."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.poll_interval
+        try:
+            signature = self._stat()
+        except OSError as e:
+            logger.warning("Could not stat course catalogue: %s", e)
+            return
+        if signature == self._signature or not self._refresh_lock.acquire(blocking=False):
+            return
+        threading.Thread(target=self._refresh, args=(signature,), name="course-index-refresh", daemon=True).start()
+
+    def refresh(self):
+        """Rebuild now, in the calling thread, if the catalogue changed."""
+        with self._refresh_lock:
+            self._rebuild(self._stat())
+
+    def _refresh(self, signature):
+        try:
+            self._rebuild(signature)
+        finally:
+            self._refresh_lock.release()
+
+    def _rebuild(self, signature):
+        try:
+            catalogue_hash = hash_catalogue(self.courses_path)
+            old = self._index
+            if old is not None and old.catalogue_hash == catalogue_hash:
+                self._signature = signature
+                return
+
+            # Another worker may already have built and saved this version
+            index, kind = load_index(self.index_path, expected_hash=catalogue_hash), "loaded"
+            if index is None:
+                records = read_courses(self.courses_path)
+                index, kind = None, "incremental"
+                if old is not None:
+                    index = update_index(old, records, catalogue_hash)
+                if index is None:
+                    index, kind = build_index(self.courses_path, catalogue_hash, records), "full"
+                try:
+                    save_index(index, self.index_path)
+                except OSError as e:
+                    logger.warning("Could not save course index: %s", e)
+
+            self._index = index
+            self.reloads[kind] += 1
+            logger.info("Course catalogue changed, now serving %d courses (%s)", len(index), kind)
+        except Exception as e:
+            # A half-written or invalid file: keep serving the old index and
+            # try again once the file changes
+            self.reloads["failed"] += 1
+            logger.error("Could not reload course catalogue: %s", e)
+        self._signature = signature
+
+
+def warm_index(courses_path=DEFAULT_COURSES_PATH, index_path=DEFAULT_INDEX_PATH):
+    """Load the index into this process ahead of time.
+
+    Called in the gunicorn master before workers fork; the workers inherit the
+    loaded index and share its matrix pages copy-on-write.
+    """
+    global _warm_index
+    _warm_index = load_or_build_index(courses_path, index_path)
+    return _warm_index
+
+
+def warmed_index():
+    """Return the index loaded by ``warm_index``, or None."""
+    return _warm_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the BITS course TF-IDF index.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build the index from the course catalogue")
+    build_parser.add_argument('--courses', default=DEFAULT_COURSES_PATH)
+    build_parser.add_argument('--output', default=DEFAULT_INDEX_PATH)
+    build_parser.add_argument('--force', action='store_true',
+                              help="Rebuild even if the saved index is up to date")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        if not args.force and load_index(args.output, expected_hash=hash_catalogue(args.courses)):
+            print(f"Course index at {args.output} is up to date")
+            return 0
+        save_index(build_index(args.courses), args.output)
+        print(f"Course index written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""BM25 keyword search over the course catalogue, for matching skills to courses.
+
+Course titles and descriptions are tokenized into an inverted index of word
+and adjacent-word-pair postings, each carrying its precomputed BM25 weight.
+A query only walks the postings of its own terms, so a lookup costs the same
+however large the catalogue grows.
+
+Skills are short and full of abbreviations ("ML", "React.js"), so queries
+are expanded through a synonym dictionary first. Words the user typed weigh
+more than the words they expand to.
+"""
+import heapq
+import json
+import math
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SYNONYMS_PATH = os.path.join(BASE_DIR, 'data', 'skill_synonyms.json')
+
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# A title word counts as this many description words
+TITLE_WEIGHT = 2
+
+# Query weight of terms that come from synonym expansion
+EXPANSION_WEIGHT = 0.6
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or such that the their this to
+with without via using use used various etc course courses introduction basic basics advanced
+concept concepts principle principles study topics topic including pre requisite prerequisite
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+[+#]*")
+_LINE_HYPHEN = re.compile(r"-\s*\n\s*")
+
+
+def normalize(text):
+    # The catalogue was extracted from a PDF, so words are split across lines ("prin-\nciples")
+    return _LINE_HYPHEN.sub("", text.lower())
+
+
+def stem(word):
+    """Fold simple plurals so "networks" finds "network"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [stem(token) for token in _TOKEN.findall(normalize(text))
+            if token not in STOP_WORDS and not token.isdigit()]
+
+
+def terms(text):
+    """Words plus adjacent word pairs, so "machine learning" outranks either word alone."""
+    words = tokenize(text)
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def load_synonyms(path=DEFAULT_SYNONYMS_PATH):
+    """Read the ``{"alias": ["expansion", ...]}`` skill dictionary, keys lower-cased."""
+    with open(path, encoding='utf-8') as f:
+        return {alias.lower().strip(): expansions for alias, expansions in json.load(f).items()}
+
+
+def expansions(query, synonyms):
+    """Synonym expansions for the whole query and for each word or word pair in it."""
+    phrase = " ".join(query.lower().split())
+    words = [word.strip(",;:()") for word in phrase.split()]
+    keys = [phrase] + words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    found = []
+    for key in dict.fromkeys(keys):
+        found.extend(synonyms.get(key, ()))
+    return found
+
+
+class CourseSearchIndex:
+    """Inverted index over catalogue rows, aligned with ``Catalogue`` rows."""
+
+    def __init__(self, numbers, postings, idf):
+        # Upper-cased once so department filters are a plain prefix check
+        self.numbers = tuple(number.upper() for number in numbers)
+        self.postings = postings
+        self.idf = idf
+
+    @classmethod
+    def from_records(cls, records):
+        """Index ``courses.json`` style dicts."""
+        frequencies = []
+        for record in records:
+            counts = {}
+            for term in terms(record['Course Title']):
+                counts[term] = counts.get(term, 0) + TITLE_WEIGHT
+            for term in terms(record['Description']):
+                counts[term] = counts.get(term, 0) + 1
+            frequencies.append(counts)
+
+        lengths = [sum(counts.values()) for counts in frequencies]
+        average_length = sum(lengths) / len(lengths) if lengths else 1.0
+        rows_by_term = {}
+        for row, counts in enumerate(frequencies):
+            norm = K1 * (1 - B + B * lengths[row] / average_length)
+            for term, tf in counts.items():
+                rows_by_term.setdefault(term, []).append((row, tf * (K1 + 1) / (tf + norm)))
+
+        count = len(records)
+        idf = {}
+        postings = {}
+        for term, entries in rows_by_term.items():
+            idf[term] = math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            postings[term] = (
+                tuple(row for row, _ in entries),
+                tuple(idf[term] * weight for _, weight in entries)
+            )
+        return cls([record['Course No'] for record in records], postings, idf)
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def query_terms(self, query, synonyms=None):
+        """``(weights, typed)``: weight per query term, and the terms the user typed."""
+        weights = {term: 1.0 for term in terms(query)}
+        typed = set(weights)
+        for expansion in expansions(query, synonyms or {}):
+            for term in terms(expansion):
+                weights.setdefault(term, EXPANSION_WEIGHT)
+        return weights, typed
+
+    def search(self, query, limit=3, prefixes=None, min_score=0.0, synonyms=None):
+        """Return up to ``limit`` (row, score) pairs, best first.
+
+        Scores are divided by the score of an ideal match on the typed
+        terms, so they fall between 0 and 1 like cosine similarities. When
+        no typed term is in the catalogue ("Kubernetes"), matches come from
+        the expansions alone and score at most ``EXPANSION_WEIGHT``.
+        ``prefixes`` keeps only course numbers starting with one of them,
+        e.g. ``["CS F", "IS F"]``.
+        """
+        weights, typed = self.query_terms(query, synonyms)
+        ideal = sum(self.idf[term] * (K1 + 1) for term in typed if term in self.idf)
+        if not ideal:
+            ideal = sum(self.idf[term] * (K1 + 1) for term in weights if term in self.idf)
+        if not ideal:
+            return []
+
+        scores = {}
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            for row, term_score in zip(*posting):
+                scores[row] = scores.get(row, 0.0) + weight * term_score
+
+        if prefixes:
+            prefixes = tuple(" ".join(prefix.upper().split()) for prefix in prefixes)
+            scores = {row: score for row, score in scores.items() if self.numbers[row].startswith(prefixes)}
+
+        # Highest score first; catalogue order breaks ties
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        results = []
+        for row, score in best:
+            score = min(1.0, score / ideal)
+            if score > 0 and score >= min_score:
+                results.append((row, score))
+        return results
+
+    def top_k(self, queries, k=3, threshold=0.0, prefixes=None, synonyms=None):
+        """``search`` for each query, matching ``CourseIndex.top_k``."""
+        return [self.search(query, k, prefixes, threshold, synonyms) for query in queries]
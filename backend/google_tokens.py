@@ -0,0 +1,122 @@
+"""Google ID-token verification with cached signing certificates.
+
+Google's signing certificates are fetched over a pooled session and kept
+until their Cache-Control expiry. Tokens that already verified are memoized
+until they expire. In the steady state, verifying a Google login makes no
+outbound HTTP calls.
+"""
+import base64
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from google.auth import jwt
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _token_key_id(token):
+    """Return the ``kid`` from a JWT header without verifying anything."""
+    try:
+        header = token.split(".", 1)[0]
+        header += "=" * (-len(header) % 4)
+        return json.loads(base64.urlsafe_b64decode(header)).get("kid")
+    except (ValueError, AttributeError):
+        return None
+
+
+class GoogleTokenVerifier:
+    """Verify Google ID tokens against cached certificates."""
+
+    def __init__(self, client_id, certs_url=GOOGLE_CERTS_URL, session=None,
+                 default_certs_ttl=300, max_tokens=10000, clock_skew=0, timeout=5.0):
+        self.client_id = client_id
+        self.certs_url = certs_url
+        self.default_certs_ttl = default_certs_ttl
+        self.max_tokens = max_tokens
+        self.clock_skew = clock_skew
+        self.timeout = timeout
+        self.cert_fetches = 0
+        self.token_hits = 0
+        self._certs = None
+        self._certs_expiry = 0.0
+        self._certs_lock = threading.Lock()
+        self._tokens = OrderedDict()
+        self._tokens_lock = threading.Lock()
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session = session
+
+    def certs(self, force_refresh=False):
+        """Return the signing certificates, fetching them when expired."""
+        with self._certs_lock:
+            if force_refresh or self._certs is None or time.time() >= self._certs_expiry:
+                self._certs, self._certs_expiry = self._fetch_certs()
+            return self._certs
+
+    def _fetch_certs(self):
+        try:
+            response = self.session.get(self.certs_url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if self._certs is not None:
+                # Keep verifying with the old keys rather than locking everyone out
+                logger.warning("Could not refresh Google certificates, reusing cached ones: %s", e)
+                return self._certs, time.time() + self.default_certs_ttl
+            raise ValueError(f"Could not fetch Google certificates: {e}")
+
+        self.cert_fetches += 1
+        ttl = self.default_certs_ttl
+        match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        if match:
+            ttl = int(match.group(1)) - int(response.headers.get("Age", "0") or 0)
+        logger.info("Fetched Google signing certificates (valid for %ss)", ttl)
+        return response.json(), time.time() + max(0, ttl)
+
+    def verify(self, token):
+        """Return the decoded claims of a valid Google ID token.
+
+        Raises ValueError if the token is malformed, expired, signed by an
+        unknown key, for another audience or from the wrong issuer.
+        """
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._tokens_lock:
+            cached = self._tokens.get(key)
+            if cached is not None and cached["exp"] > now:
+                self._tokens.move_to_end(key)
+                self.token_hits += 1
+                return dict(cached)
+
+        certs = self.certs()
+        key_id = _token_key_id(token)
+        if key_id is not None and key_id not in certs:
+            # Google rotated its keys before our cached copy expired
+            certs = self.certs(force_refresh=True)
+
+        idinfo = jwt.decode(
+            token,
+            certs=certs,
+            audience=self.client_id,
+            clock_skew_in_seconds=self.clock_skew
+        )
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError("Wrong issuer.")
+
+        with self._tokens_lock:
+            self._tokens[key] = dict(idinfo)
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+        return idinfo
@@ -0,0 +1,22 @@
+"""Gunicorn settings for the backend.
+
+The app module itself is not preloaded: importing it starts threads (log
+listener, job runner) and pools that don't survive a fork. Instead the master
+loads only the course index before forking, so every worker inherits it
+ready to use and shares its memory copy-on-write.
+"""
+import gc
+import os
+
+# Bind address and worker count keep gunicorn's defaults ($PORT, $WEB_CONCURRENCY)
+
+
+def on_starting(server):
+    if os.getenv("PRELOAD_COURSE_INDEX", "1") != "1":
+        return
+    from course_index import warm_index
+
+    index = warm_index()
+    # Keep the collector from touching (and so copying) the inherited objects
+    gc.freeze()
+    server.log.info("Warmed course index with %d courses before forking workers", len(index))
@@ -0,0 +1,278 @@
+"""Asynchronous job pipeline backed by a local SQLite store.
+
+A job is a list of named stages run in order on a bounded worker pool. Each
+stage has its own timeout. Inputs and the JSON state after every completed
+stage are persisted, so jobs left queued or running by a worker that died are
+resumed from their last completed stage when a worker starts again.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from sqlite_connections import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the job queue has no room for another job."""
+
+
+class Stage:
+    """One named pipeline step: ``func(inputs, state, deadline)`` updates ``state`` in place.
+
+    ``inputs`` maps input names to the bytes given at submit time and ``state``
+    is a JSON-serialisable dict carried between stages. A stage stores the job
+    output in ``state['result']`` and can set ``state['done']`` to skip the
+    remaining stages. ``deadline`` is the ``time.monotonic()`` value at which
+    the stage times out; a stage abandoned at its timeout keeps running, so it
+    should hand the deadline to slow calls and skip side effects once it passes.
+    """
+
+    def __init__(self, name, func, timeout):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+
+
+class JobStore:
+    """SQLite persistence for jobs, their inputs and their stage state."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connections = ThreadConnections(path, timeout=10.0, row_factory=sqlite3.Row)
+        with self._connections.get() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, pipeline TEXT NOT NULL, status TEXT NOT NULL,"
+                " stage TEXT, completed_stages INTEGER NOT NULL DEFAULT 0,"
+                " state TEXT NOT NULL DEFAULT '{}', result TEXT, error TEXT,"
+                " owner TEXT, created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_inputs ("
+                " job_id TEXT NOT NULL, name TEXT NOT NULL, data BLOB NOT NULL,"
+                " PRIMARY KEY (job_id, name))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def create(self, pipeline, inputs):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connections.get() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, pipeline, status, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (job_id, pipeline, QUEUED, now, now)
+            )
+            conn.executemany(
+                "INSERT INTO job_inputs (job_id, name, data) VALUES (?, ?, ?)",
+                [(job_id, name, sqlite3.Binary(data)) for name, data in inputs.items()]
+            )
+        return job_id
+
+    def get(self, job_id):
+        row = self._connections.get().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['state'] = json.loads(job['state'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def inputs(self, job_id):
+        rows = self._connections.get().execute(
+            "SELECT name, data FROM job_inputs WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return {row['name']: bytes(row['data']) for row in rows}
+
+    def claim(self, job_id, owner):
+        """Atomically move a queued job to running; False if someone else has it."""
+        with self._connections.get() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, updated = ? WHERE id = ? AND status = ?",
+                (RUNNING, owner, time.time(), job_id, QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def save_stage(self, job_id, stage, completed_stages, state):
+        with self._connections.get() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, completed_stages = ?, state = ?, updated = ? WHERE id = ?",
+                (stage, completed_stages, json.dumps(state), time.time(), job_id)
+            )
+
+    def finish(self, job_id, status, result=None, error=None):
+        with self._connections.get() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, state = '{}', updated = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+            conn.execute("DELETE FROM job_inputs WHERE job_id = ?", (job_id,))
+
+    def requeue_orphans(self, is_alive):
+        """Return jobs whose owner process is gone to the queue."""
+        rows = self._connections.get().execute(
+            "SELECT id, owner FROM jobs WHERE status = ?", (RUNNING,)
+        ).fetchall()
+        with self._connections.get() as conn:
+            for row in rows:
+                if not is_alive(row['owner']):
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, owner = NULL, updated = ? WHERE id = ? AND status = ?",
+                        (QUEUED, time.time(), row['id'], RUNNING)
+                    )
+
+    def queued_ids(self):
+        rows = self._connections.get().execute(
+            "SELECT id FROM jobs WHERE status = ? ORDER BY created", (QUEUED,)
+        ).fetchall()
+        return [row['id'] for row in rows]
+
+    def purge(self, older_than):
+        """Delete finished jobs last updated before ``older_than``."""
+        with self._connections.get() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?",
+                (SUCCEEDED, FAILED, older_than)
+            )
+
+
+def _process_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_is_alive(owner):
+    """True unless ``owner`` is a dead process on this host."""
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname():
+        # Can't tell for other hosts; leave their jobs alone
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class JobRunner:
+    """Run persisted jobs through registered pipelines on a bounded pool."""
+
+    def __init__(self, store, max_workers=4, max_queued=100, retention=24 * 3600):
+        self.store = store
+        self.max_queued = max_queued
+        self.retention = retention
+        self.pipelines = {}
+        self._owner = None
+        self._executor = None
+        self._executor_pid = None
+        self._max_workers = max_workers
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def register(self, name, stages):
+        self.pipelines[name] = stages
+
+    def _pool(self):
+        # Worker threads don't survive a fork, so each process builds its own pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix='job')
+            self._executor_pid = os.getpid()
+            self._owner = _process_owner()
+            self._active = 0
+        return self._executor
+
+    def submit(self, pipeline, inputs):
+        """Persist a new job and queue it; raises QueueFullError when saturated."""
+        if pipeline not in self.pipelines:
+            raise ValueError(f"Unknown pipeline: {pipeline}")
+        with self._lock:
+            if self._active >= self.max_queued:
+                raise QueueFullError("Job queue is full, try again later")
+            self._active += 1
+        try:
+            job_id = self.store.create(pipeline, inputs)
+        except Exception:
+            with self._lock:
+                self._active -= 1
+            raise
+        self._pool().submit(self._run, job_id)
+        return job_id
+
+    def recover(self):
+        """Resume jobs orphaned by a dead worker and clear out old finished jobs."""
+        self.store.purge(time.time() - self.retention)
+        self.store.requeue_orphans(_owner_is_alive)
+        executor = self._pool()
+        for job_id in self.store.queued_ids():
+            with self._lock:
+                self._active += 1
+            executor.submit(self._run, job_id)
+
+    def status(self, job_id):
+        return self.store.get(job_id)
+
+    def _run(self, job_id):
+        try:
+            if not self.store.claim(job_id, self._owner):
+                return
+            self._run_stages(job_id)
+        except Exception as e:
+            logger.exception("Job %s crashed", job_id)
+            self.store.finish(job_id, FAILED, error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _run_stages(self, job_id):
+        job = self.store.get(job_id)
+        stages = self.pipelines[job['pipeline']]
+        inputs = self.store.inputs(job_id)
+        state = job['state']
+
+        # Stages run on their own thread so a stuck one can be abandoned at its timeout
+        stage_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'job-{job_id[:8]}')
+        try:
+            for position in range(job['completed_stages'], len(stages)):
+                stage = stages[position]
+                self.store.save_stage(job_id, stage.name, position, state)
+                deadline = time.monotonic() + stage.timeout
+                future = stage_pool.submit(stage.func, inputs, state, deadline)
+                try:
+                    future.result(timeout=stage.timeout)
+                except FutureTimeoutError:
+                    logger.error("Job %s stage %s timed out", job_id, stage.name)
+                    self.store.finish(job_id, FAILED, error=f"Stage '{stage.name}' timed out")
+                    # Hold this job's worker slot while the abandoned stage winds down,
+                    # so stuck stages still count against max_workers
+                    wait([future], timeout=stage.timeout)
+                    return
+                except Exception as e:
+                    logger.error("Job %s failed in stage %s: %s", job_id, stage.name, e)
+                    self.store.finish(job_id, FAILED, error=str(e))
+                    return
+
+                if state.get('done'):
+                    break
+                self.store.save_stage(job_id, stage.name, position + 1, state)
+        finally:
+            stage_pool.shutdown(wait=False)
+
+        self.store.finish(job_id, SUCCEEDED, result=state.get('result'))
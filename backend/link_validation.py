@@ -0,0 +1,103 @@
+"""Concurrent validation of course recommendation links.
+
+All URLs in a GPT response are checked at once over a pooled HTTP session,
+under a single overall deadline. Results are remembered in a TTL cache of
+known-good and known-bad URLs, since the same course links come back often.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class LinkValidator:
+    """Check that URLs answer 200, concurrently and with cached verdicts."""
+
+    def __init__(self, max_workers=8, request_timeout=5.0, deadline=6.0,
+                 good_ttl=24 * 3600, bad_ttl=3600, max_entries=5000, session=None):
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.good_ttl = good_ttl
+        self.bad_ttl = bad_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='link-check')
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+    def check(self, url):
+        """Return True if ``url`` answers 200 (after redirects)."""
+        try:
+            response = self.session.head(url, timeout=self.request_timeout, allow_redirects=True)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def validate(self, urls):
+        """Return a dict mapping each URL to whether it is reachable.
+
+        URLs still unanswered when the overall deadline passes count as
+        invalid for this call but are not cached.
+        """
+        results = {}
+        to_check = []
+        now = time.monotonic()
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                cached = self._cache.get(url)
+                if cached is not None and cached[1] > now:
+                    self._cache.move_to_end(url)
+                    results[url] = cached[0]
+                    self.hits += 1
+                else:
+                    to_check.append(url)
+                    self.misses += 1
+
+        if not to_check:
+            return results
+
+        futures = {self._executor.submit(self.check, url): url for url in to_check}
+        done, not_done = wait(futures, timeout=self.deadline)
+        for future in not_done:
+            future.cancel()
+            results[futures[future]] = False
+        if not_done:
+            logger.warning("Link validation deadline hit for %d URLs", len(not_done))
+
+        for future in done:
+            url = futures[future]
+            valid = future.result()
+            results[url] = valid
+            self._remember(url, valid)
+        return results
+
+    def filter_valid(self, urls):
+        """Return the reachable URLs from ``urls`` in their original order."""
+        results = self.validate(urls)
+        return [url for url in urls if results.get(url)]
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
+
+    def _remember(self, url, valid):
+        ttl = self.good_ttl if valid else self.bad_ttl
+        with self._lock:
+            self._cache[url] = (valid, time.monotonic() + ttl)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
@@ -0,0 +1,268 @@
+"""Shared gate in front of every OpenAI chat completion.
+
+Each model gets its own concurrency limit and, optionally, a token bucket
+capping requests per second. Every call carries a deadline, which bounds
+the time spent waiting for a slot, the HTTP timeout and any retries.
+Rate-limit, timeout, connection and 5xx errors are retried with full-jitter
+exponential backoff. A 429 also pauses new calls to that model for the
+Retry-After period, so one process's callers back off together instead of
+all retrying into the limit at once. When too many callers are already
+waiting, new ones are turned away at once with ``LLMBusyError``.
+"""
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when a call is shed because the model's queue is full or rate-limited."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMDeadlineError(TimeoutError):
+    """Raised when a call could not complete before its deadline."""
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``capacity`` saved."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class _ModelGate:
+    def __init__(self, concurrency, rate, burst):
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.waiting = 0
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.counts = {}
+
+
+class _ReleasingStream:
+    """Streamed completion that holds its model slot until it is closed or exhausted."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self.close()
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            try:
+                self._stream.close()
+            finally:
+                release()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._stream, name)
+
+    def __del__(self):
+        self.close()
+
+
+def _openai_errors():
+    """``(rate_limit_error, timeout_error, retryable_errors)``; imported late like the client."""
+    import openai
+    return openai.RateLimitError, openai.APITimeoutError, (
+        openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError
+    )
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait, if it said."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class LLMDispatcher:
+    """Run chat completions under per-model limits, deadlines and retries.
+
+    ``get_client()`` returns the OpenAI client; it should be created with
+    ``max_retries=0`` so retries happen here, where they can see the deadline.
+    """
+
+    def __init__(self, get_client, concurrency=8, model_concurrency=None, max_queue=32,
+                 rate=0.0, burst=None, timeout=60.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0):
+        self.get_client = get_client
+        self.concurrency = concurrency
+        self.model_concurrency = model_concurrency or {}
+        self.max_queue = max_queue
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._gates = {}
+        self._lock = threading.Lock()
+
+    def _gate(self, model):
+        with self._lock:
+            gate = self._gates.get(model)
+            if gate is None:
+                gate = self._gates[model] = _ModelGate(
+                    self.model_concurrency.get(model, self.concurrency), self.rate, self.burst
+                )
+            return gate
+
+    def _count(self, gate, outcome):
+        with self._lock:
+            gate.counts[outcome] = gate.counts.get(outcome, 0) + 1
+
+    def _acquire(self, model, gate, deadline, first_attempt):
+        """Wait for a slot and a rate token; returns with the slot held."""
+        with self._lock:
+            if first_attempt and gate.waiting >= self.max_queue:
+                gate.counts["shed"] = gate.counts.get("shed", 0) + 1
+                raise LLMBusyError(f"Too many {model} requests are queued, try again shortly")
+            gate.waiting += 1
+        try:
+            pause = gate.paused_until - time.monotonic()
+            if pause > 0:
+                if time.monotonic() + pause >= deadline:
+                    self._count(gate, "shed")
+                    raise LLMBusyError(f"{model} is rate limited, try again shortly", retry_after=pause)
+                time.sleep(pause)
+
+            if not gate.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                self._count(gate, "deadline")
+                raise LLMDeadlineError(f"Timed out waiting for a {model} slot")
+        finally:
+            with self._lock:
+                gate.waiting -= 1
+
+        if gate.bucket is not None:
+            wait = gate.bucket.reserve()
+            if time.monotonic() + wait >= deadline:
+                gate.bucket.refund()
+                gate.slots.release()
+                self._count(gate, "shed")
+                raise LLMBusyError(f"{model} request rate limit reached, try again shortly", retry_after=wait)
+            time.sleep(wait)
+
+        with self._lock:
+            gate.in_flight += 1
+
+    def _release(self, gate):
+        with self._lock:
+            gate.in_flight -= 1
+        gate.slots.release()
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def create(self, model, timeout=None, deadline=None, **kwargs):
+        """``chat.completions.create`` for ``model``, finishing by ``deadline``.
+
+        ``deadline`` is a ``time.monotonic()`` value; without one the call gets
+        ``timeout`` (or the dispatcher default) seconds from now. Streamed
+        responses keep their slot until the stream is closed.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + (timeout or self.timeout)
+        gate = self._gate(model)
+        rate_limit_error, timeout_error, retryable = _openai_errors()
+        attempt = 0
+
+        while True:
+            self._acquire(model, gate, deadline, first_attempt=attempt == 0)
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LLMDeadlineError(f"{model} request deadline passed")
+                response = self.get_client().chat.completions.create(model=model, timeout=remaining, **kwargs)
+            except retryable as e:
+                self._release(gate)
+                delay = self._backoff(attempt, e)
+                if isinstance(e, rate_limit_error):
+                    with self._lock:
+                        gate.paused_until = max(gate.paused_until, time.monotonic() + delay)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    self._count(gate, "failed")
+                    if isinstance(e, rate_limit_error):
+                        raise LLMBusyError(f"{model} is rate limited, try again shortly",
+                                           retry_after=delay) from e
+                    if isinstance(e, timeout_error):
+                        raise LLMDeadlineError(f"{model} request timed out") from e
+                    raise
+                self._count(gate, "retried")
+                logger.warning("Retrying %s request in %.2fs after %s", model, delay, e.__class__.__name__)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self._release(gate)
+                self._count(gate, "failed")
+                raise
+
+            self._count(gate, "ok")
+            if kwargs.get("stream"):
+                return _ReleasingStream(response, lambda: self._release(gate))
+            self._release(gate)
+            return response
+
+    def stats(self):
+        """Per-model queue depth, in-flight calls and outcome counts."""
+        with self._lock:
+            return {
+                model: dict(gate.counts, waiting=gate.waiting, in_flight=gate.in_flight,
+                            concurrency=gate.concurrency)
+                for model, gate in self._gates.items()
+            }
+
+
+def parse_model_limits(value):
+    """Parse ``"gpt-4o-mini=8,gpt-3.5-turbo=4"`` into a dict."""
+    limits = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            model, limit = item.split("=", 1)
+            limits[model.strip()] = int(limit)
+    return limits
@@ -0,0 +1,106 @@
+"""Logging that keeps disk and console writes off request threads.
+
+Request threads only put records on an in-memory queue; a background
+``QueueListener`` formats them and writes to a log file and the console.
+Records carry the id of the request that produced them.
+
+Every gunicorn worker appends to the same file, so none of them rotates it:
+rotation is left to logrotate (or similar), and ``WatchedFileHandler``
+reopens the file once it has been moved away.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+from flask import g, has_request_context
+
+# Standard LogRecord attributes; anything else was passed via ``extra``
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request id, or "-" outside requests."""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = g.get("request_id", "-") if has_request_context() else "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key not in entry:
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener's handlers.
+
+    The stock ``prepare`` formats the record with this handler's formatter,
+    folding any traceback into the message. Here only the message arguments
+    are merged (they may be mutable) and the traceback is rendered to text, so
+    each output handler can still apply its own format.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+
+def configure_logging(level="INFO", log_file="app.log", json_format=True, use_queue=True):
+    """Install root handlers; return the started ``QueueListener`` or None."""
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(logging.handlers.WatchedFileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+    listener = None
+    if use_queue:
+        records = queue.SimpleQueue()
+        queue_handler = _QueueHandler(records)
+        # Filters on the queue handler run on the logging thread, where the
+        # request context is still available
+        queue_handler.addFilter(RequestIdFilter())
+        root.addHandler(queue_handler)
+        listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+    else:
+        for handler in handlers:
+            handler.addFilter(RequestIdFilter())
+            root.addHandler(handler)
+    return listener
@@ -0,0 +1,176 @@
+"""Hot-path latency instrumentation with Prometheus text exposition.
+
+Counters, histograms and callback gauges are kept in-process, so each
+gunicorn worker reports its own numbers. When metrics are disabled,
+``span`` returns a shared no-op context manager and recording calls return
+immediately, so the instrumentation costs next to nothing.
+"""
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.metrics.observe("stage_duration_seconds", elapsed, stage=self.stage)
+        if has_request_context():
+            g.setdefault("stage_timings", []).append((self.stage, elapsed))
+        return False
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """In-process registry of counters, histograms and callback gauges."""
+
+    def __init__(self, enabled=True, server_timing=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.server_timing = enabled and server_timing
+        self.buckets = tuple(buckets)
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def span(self, stage):
+        """Time a block of work as one pipeline stage."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets)
+            histogram.counts[position] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def register_gauge(self, name, func, help_text=None):
+        """Register a gauge read at scrape time.
+
+        ``func()`` returns a number, or a dict mapping label tuples such as
+        ``(("cache", "pdf"),)`` to numbers.
+        """
+        self._gauges[name] = func
+        if help_text:
+            self.describe(name, help_text)
+
+    def record_llm_usage(self, model, response):
+        """Count prompt and completion tokens from an OpenAI response."""
+        usage = getattr(response, "usage", None)
+        if not self.enabled or usage is None:
+            return
+        self.inc("llm_tokens_total", usage.prompt_tokens or 0, model=model, kind="prompt")
+        self.inc("llm_tokens_total", usage.completion_tokens or 0, model=model, kind="completion")
+
+    def server_timing_header(self):
+        """Server-Timing header value for the stages timed in this request."""
+        timings = g.get("stage_timings") or []
+        return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()
+            }
+
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name in seen:
+                return
+            seen.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", _format_value(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for name, func in sorted(self._gauges.items()):
+            header(name, "gauge")
+            values = func()
+            if not isinstance(values, dict):
+                values = {(): values}
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
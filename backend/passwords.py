@@ -0,0 +1,69 @@
+"""Argon2 password hashing on a bounded executor.
+
+Argon2 is deliberately expensive in CPU and memory, so hashes are computed on
+a small dedicated pool instead of the request thread. Admission control
+rejects work immediately once the pool and its queue are full, so a login
+burst can't starve every other endpoint.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordServiceBusy(RuntimeError):
+    """Raised when too many hash operations are already queued."""
+
+
+class PasswordService:
+    """Hash and verify passwords off the request thread."""
+
+    def __init__(self, time_cost=3, memory_cost=65536, parallelism=4,
+                 max_workers=2, max_pending=16, timeout=10.0):
+        self.hasher = PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism
+        )
+        self.timeout = timeout
+        # argon2-cffi releases the GIL, so a thread pool runs hashes in parallel
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='argon2')
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordServiceBusy("Too many authentication requests, try again shortly")
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # Free the slot when the work finishes, even if the caller stopped waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=self.timeout)
+
+    def hash(self, password):
+        """Return an argon2 hash of ``password``."""
+        return self._run(self.hasher.hash, password)
+
+    def verify(self, password_hash, password):
+        """Check ``password`` against ``password_hash``.
+
+        Returns ``(valid, new_hash)``. ``new_hash`` is set when the stored hash
+        was made with different cost parameters and should be replaced.
+        """
+        return self._run(self._verify, password_hash, password)
+
+    def _verify(self, password_hash, password):
+        try:
+            self.hasher.verify(password_hash, password)
+        except VerifyMismatchError:
+            return False, None
+        if self.hasher.check_needs_rehash(password_hash):
+            return True, self.hasher.hash(password)
+        return True, None
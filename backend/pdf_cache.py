@@ -0,0 +1,164 @@
+"""Content-addressed cache for text extracted from uploaded PDFs.
+
+Entries are keyed by the SHA-256 of the file bytes. Lookups go to a bounded
+in-memory LRU first and then to an optional on-disk store, which lets every
+gunicorn worker on the host share extractions.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Check the disk store size after this many writes rather than on every write
+DISK_EVICTION_INTERVAL = 16
+
+
+def content_hash(data):
+    """Return the cache key for a file's raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PdfTextCache:
+    """Two-level (memory, then disk) cache of extracted PDF text."""
+
+    def __init__(self, max_memory_bytes=64 * 1024 * 1024, disk_dir=None,
+                 max_disk_bytes=512 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_writes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key):
+        """Return cached text for ``key`` or None."""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+
+        text = self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        """Store ``text`` under ``key`` in memory and, if enabled, on disk."""
+        self._remember(key, text)
+        self._write_disk(key, text)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+    def _remember(self, key, text):
+        size = len(text.encode('utf-8'))
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous.encode('utf-8'))
+            self._entries[key] = text
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= len(evicted.encode('utf-8'))
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.txt")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Could not read cached PDF text %s: %s", path, e)
+            return None
+        try:
+            # Touch the entry so eviction treats mtime as last use
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def _write_disk(self, key, text):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write cached PDF text %s: %s", path, e)
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            run_eviction = self._disk_writes % DISK_EVICTION_INTERVAL == 0
+        if run_eviction:
+            self.evict_disk()
+
+    def evict_disk(self):
+        """Delete least recently used files until the store fits its size limit."""
+        if not self.disk_dir:
+            return
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith('.txt'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= self.max_disk_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Another worker may have evicted it already
+                pass
+        logger.info("Evicted PDF text cache down to %d bytes", total)
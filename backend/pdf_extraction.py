@@ -0,0 +1,196 @@
+"""Parallel PDF text extraction on a bounded process pool.
+
+PyPDF2 parsing is pure-Python CPU work, so it runs in worker processes rather
+than on the Flask request thread. Several documents are parsed at the same
+time, and large documents are split into page ranges that run in parallel.
+Size, page-count and per-document time limits keep one pathological PDF from
+stalling a gunicorn worker.
+
+A document is given either as bytes or as the path of a file on disk. Paths
+are memory-mapped by the extraction processes, so large uploads are never
+copied through the pool.
+"""
+import io
+import logging
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Separates page texts, so later stages can tell where pages start and end
+PAGE_BREAK = '\f'
+
+
+class PdfLimitError(ValueError):
+    """Raised when a PDF exceeds the configured size or page limits."""
+
+
+class PdfTimeoutError(TimeoutError):
+    """Raised when a PDF takes longer than the per-document timeout."""
+
+
+def _reader(source):
+    # Imported here so only the pool processes load PyPDF2, not the web worker
+    import PyPDF2
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            # The mapping stays valid after the file is closed
+            return PyPDF2.PdfReader(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return PyPDF2.PdfReader(io.BytesIO(source))
+
+
+def _open_document(source, max_pages, first_pages):
+    """Worker: check the page limit and extract the first ``first_pages`` pages.
+
+    Returns ``(page_count, text)`` so small documents finish in a single task.
+    """
+    reader = _reader(source)
+    count = len(reader.pages)
+    if count > max_pages:
+        raise PdfLimitError(f"PDF has {count} pages, the limit is {max_pages}")
+    return count, PAGE_BREAK.join(reader.pages[i].extract_text() for i in range(min(first_pages, count)))
+
+
+def _extract_pages(source, start, stop):
+    """Worker: extract and join the text of pages ``start`` to ``stop``."""
+    reader = _reader(source)
+    return PAGE_BREAK.join(reader.pages[i].extract_text() for i in range(start, stop))
+
+
+class PdfExtractor:
+    """Extract text from several PDFs concurrently on a shared process pool."""
+
+    def __init__(self, max_workers=None, max_pages=50, max_bytes=10 * 1024 * 1024,
+                 timeout=20.0, pages_per_task=8):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.pages_per_task = pages_per_task
+        self._executor = None
+        # Pools terminated on purpose; work that was running on them is retried
+        self._killed = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # Workers only need PyPDF2, so spawn them clean instead of forking the app
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _reset_pool(self, executor):
+        """Kill the pool's workers so a stuck parse cannot hold a slot forever.
+
+        Other requests with work on the same pool see it fail and resubmit it
+        to the replacement pool.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._killed.add(executor)
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list(getattr(executor, '_processes', {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def check_limits(self, source):
+        size = os.path.getsize(source) if isinstance(source, str) else len(source)
+        if size > self.max_bytes:
+            raise PdfLimitError(
+                f"PDF is {size} bytes, the limit is {self.max_bytes} bytes"
+            )
+
+    def extract(self, source):
+        """Extract text from one PDF given as bytes or a file path."""
+        return self.extract_many([source])[0]
+
+    def extract_many(self, documents):
+        """Extract text from each PDF in ``documents`` (bytes or paths), preserving order.
+
+        Raises PdfLimitError, PdfTimeoutError or the parser's own exception for
+        the first document that fails.
+        """
+        for data in documents:
+            self.check_limits(data)
+        if not documents:
+            return []
+
+        crash_retries = 1
+        while True:
+            executor = self._pool()
+            try:
+                return self._extract_on(executor, documents)
+            except PdfTimeoutError:
+                logger.error("PDF extraction timed out, restarting extraction workers")
+                self._reset_pool(executor)
+                raise
+            except (BrokenProcessPool, CancelledError, RuntimeError) as e:
+                if executor in self._killed:
+                    # Another request's document timed out and took the pool down with it
+                    logger.warning("PDF extraction workers were restarted, resubmitting %d document(s)",
+                                   len(documents))
+                    continue
+                if not isinstance(e, BrokenProcessPool):
+                    raise
+                self._reset_pool(executor)
+                # The crash may have come from another request's document, so try once more
+                if crash_retries:
+                    crash_retries -= 1
+                    logger.warning("PDF extraction worker crashed, retrying on new extraction workers")
+                    continue
+                logger.error("PDF extraction worker crashed again, giving up")
+                raise
+
+    def _extract_on(self, executor, documents):
+        # Documents run side by side, so each one gets the same deadline
+        deadline = time.monotonic() + self.timeout
+        counts = {
+            executor.submit(_open_document, data, self.max_pages, self.pages_per_task): doc
+            for doc, data in enumerate(documents)
+        }
+        chunks = {}
+        parts = [None] * len(documents)
+        pending = set(counts)
+
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise PdfTimeoutError(f"PDF extraction exceeded {self.timeout}s")
+
+            for future in done:
+                if future in counts:
+                    doc = counts[future]
+                    page_count, first_text = future.result()
+                    # Fan the remaining pages out in ranges that run in parallel
+                    ranges = [
+                        (start, min(start + self.pages_per_task, page_count))
+                        for start in range(self.pages_per_task, page_count, self.pages_per_task)
+                    ]
+                    parts[doc] = [first_text] + [None] * len(ranges)
+                    for position, (start, stop) in enumerate(ranges, start=1):
+                        chunk = executor.submit(_extract_pages, documents[doc], start, stop)
+                        chunks[chunk] = (doc, position)
+                        pending.add(chunk)
+                else:
+                    doc, position = chunks[future]
+                    parts[doc][position] = future.result()
+
+        return [PAGE_BREAK.join(doc_parts) for doc_parts in parts]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
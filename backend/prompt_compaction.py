@@ -0,0 +1,186 @@
+"""Shrink extracted JD and CV text before it goes into a prompt.
+
+PDF extraction leaves whitespace runs, words hyphenated across line breaks,
+headers and footers repeated on every page, and duplicated lines. All of
+these cost prompt tokens without helping the model. ``compact_document``
+cleans them up and, if the document is still over its token budget, keeps
+whole sections in priority order (skills and experience before education,
+hobbies or company boilerplate) and drops the rest. Kept sections stay in
+their original order.
+
+Token counts are estimated at four characters per token, OpenAI's rule of
+thumb for English text, which is close enough for budgeting.
+"""
+import re
+
+CHARS_PER_TOKEN = 4
+
+# PdfExtractor separates pages with a form feed
+PAGE_BREAK = "\f"
+
+# A line at the top or bottom of at least this share of pages is a header/footer
+FURNITURE_MIN_SHARE = 0.5
+FURNITURE_EDGE_LINES = 2
+
+# Shorter repeated lines (bullets such as "- Python") are cheap and may be meaningful
+DEDUP_MIN_LENGTH = 20
+
+# Smallest leftover worth keeping when a line has to be cut mid-way
+MIN_PARTIAL_LINE = 40
+
+# Section headings by priority, lowest number kept first
+SECTION_PRIORITIES = [
+    (0, ("skills", "technical skills", "key skills", "core competencies", "requirements",
+         "qualifications", "required skills", "must have", "what you'll need", "what we're looking for")),
+    (1, ("experience", "work experience", "professional experience", "employment", "employment history",
+         "responsibilities", "key responsibilities", "what you'll do", "role", "the role", "job description")),
+    (2, ("projects", "key projects", "achievements", "accomplishments", "preferred qualifications",
+         "nice to have", "good to have")),
+    (3, ("summary", "profile", "professional summary", "objective", "career objective", "about you")),
+    (4, ("certifications", "certificates", "courses", "training", "publications")),
+    (5, ("education", "academic details", "academics")),
+    (8, ("about us", "about the company", "who we are", "benefits", "perks", "what we offer",
+         "equal opportunity", "how to apply")),
+    (9, ("hobbies", "interests", "extracurricular activities", "languages", "personal details",
+         "personal information", "declaration", "references")),
+]
+# Text before the first heading: usually the name and contact line, or the job title
+PREAMBLE_PRIORITY = 3
+
+_HEADINGS = {heading: priority for priority, headings in SECTION_PRIORITIES for heading in headings}
+_HEADING_CLEANUP = re.compile(r"[^a-z' ]+")
+_HYPHEN_BREAK = re.compile(r"(\w)-\n([a-z])")
+_SPACE_RUN = re.compile(r"[ \t\v\u00a0\u2000-\u200b\u3000]+")
+_BLANK_RUN = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_whitespace(text):
+    """Rejoin lines broken after a hyphen and collapse space runs, line by line."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # Keep the hyphen: "data pipe-lines" is harmless, "wellknown" would not be
+    text = _HYPHEN_BREAK.sub(r"\1-\2", text)
+    return [_SPACE_RUN.sub(" ", line).strip() for line in text.split("\n")]
+
+
+def _furniture_key(line):
+    # Ignore digits so "Page 2 of 5" matches "Page 3 of 5"
+    return _DIGITS.sub("#", line.lower())
+
+
+def remove_page_furniture(pages):
+    """Drop header and footer lines that repeat across pages.
+
+    ``pages`` is a list of line lists. A line counts as furniture when it
+    appears among the first or last ``FURNITURE_EDGE_LINES`` lines of at least
+    ``FURNITURE_MIN_SHARE`` of the pages (and of two pages at minimum).
+    """
+    if len(pages) < 2:
+        return pages
+
+    def edges(lines):
+        content = [i for i, line in enumerate(lines) if line]
+        return set(content[:FURNITURE_EDGE_LINES] + content[-FURNITURE_EDGE_LINES:])
+
+    page_edges = [edges(lines) for lines in pages]
+    counts = {}
+    for lines, positions in zip(pages, page_edges):
+        for key in {_furniture_key(lines[i]) for i in positions}:
+            counts[key] = counts.get(key, 0) + 1
+
+    threshold = max(2, FURNITURE_MIN_SHARE * len(pages))
+    furniture = {key for key, count in counts.items() if count >= threshold}
+    return [
+        [line for i, line in enumerate(lines) if i not in positions or _furniture_key(line) not in furniture]
+        for lines, positions in zip(pages, page_edges)
+    ]
+
+
+def remove_duplicate_lines(lines):
+    """Keep only the first copy of each repeated line of ``DEDUP_MIN_LENGTH`` or more."""
+    seen = set()
+    kept = []
+    for line in lines:
+        if len(line) >= DEDUP_MIN_LENGTH:
+            if line in seen:
+                continue
+            seen.add(line)
+        kept.append(line)
+    return kept
+
+
+def clean_text(text):
+    """Normalise whitespace, strip headers/footers and duplicate lines."""
+    pages = [normalize_whitespace(page) for page in text.split(PAGE_BREAK)]
+    lines = [line for page in remove_page_furniture(pages) for line in page]
+    return _BLANK_RUN.sub("\n\n", "\n".join(remove_duplicate_lines(lines))).strip()
+
+
+def heading_priority(line):
+    """Priority of ``line`` if it looks like a known section heading, else None."""
+    if len(line) > 40:
+        return None
+    key = _HEADING_CLEANUP.sub("", line.lower().replace("&", " ")).strip()
+    key = " ".join(key.split())
+    return _HEADINGS.get(key)
+
+
+def split_sections(text):
+    """Split into ``(priority, lines)`` sections at recognised headings."""
+    sections = [(PREAMBLE_PRIORITY, [])]
+    for line in text.split("\n"):
+        priority = heading_priority(line)
+        if priority is not None:
+            sections.append((priority, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(priority, lines) for priority, lines in sections if any(lines)]
+
+
+def trim_to_budget(text, max_tokens):
+    """Keep the highest-priority sections that fit in ``max_tokens``, in document order.
+
+    The first section that doesn't fit whole is cut, at a line boundary
+    where possible, and nothing of lower priority is kept after it.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sections = split_sections(text)
+    budget = max_tokens * CHARS_PER_TOKEN
+    keep = {}
+    # Stable sort: equal priorities keep their document order
+    for position in sorted(range(len(sections)), key=lambda i: sections[i][0]):
+        lines = []
+        cut = False
+        for line in sections[position][1]:
+            cost = len(line) + 1
+            if cost > budget:
+                cut = True
+                # Long unbroken text (one huge line) still contributes its start
+                head = line[:max(0, budget - 1)].rsplit(" ", 1)[0]
+                if len(head) >= MIN_PARTIAL_LINE:
+                    lines.append(head)
+                break
+            lines.append(line)
+            budget -= cost
+        # A heading on its own says nothing, so don't spend tokens on it
+        if lines and not (cut and len(lines) == 1 and heading_priority(lines[0]) is not None):
+            keep[position] = lines
+        if cut:
+            break
+    return "\n".join("\n".join(keep[i]) for i in sorted(keep)).strip()
+
+
+def compact_document(text, max_tokens=None):
+    """Return ``(compacted_text, tokens_before, tokens_after)``."""
+    text = text or ""
+    tokens_before = estimate_tokens(text)
+    compacted = clean_text(text)
+    if max_tokens:
+        compacted = trim_to_budget(compacted, max_tokens)
+    return compacted, tokens_before, estimate_tokens(compacted)
@@ -0,0 +1,151 @@
+"""Bank of generated interview questions, reused across /generate-questions calls.
+
+Every generated question is stored with the hash of the job description it
+was written for, the hash of the CV, and the requested skills it mentions.
+A later request for the same JD gets that JD's questions back: all of them
+when the CV matches, otherwise only the ones the model itself tagged [JD],
+since [CV] and [JD+CV] questions are about one particular candidate and a
+tag guessed by the caller's heuristics can't be trusted to mean otherwise.
+Shared [JD] questions that mention a requested skill can also fill in for a
+different JD. Only the shortfall is generated. Questions are stored with the
+prompt version they were written for, and only the current version is served.
+
+The bank is a SQLite file, so every gunicorn worker on the host shares it.
+"""
+import logging
+import re
+import threading
+import time
+
+from sqlite_connections import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+_TAG = re.compile(r"\[(JD\+CV|JD|CV)\]\s*$")
+
+
+def question_tag(question):
+    """The question's [JD]/[CV]/[JD+CV] source tag, without brackets, or None."""
+    match = _TAG.search(question)
+    return match.group(1) if match else None
+
+
+def question_skills(question, skills):
+    """The skills, lower-cased, that ``question`` mentions by name."""
+    lower = question.lower()
+    return sorted({skill.lower().strip() for skill in skills if skill and skill.strip() and skill.lower().strip() in lower})
+
+
+class QuestionBank:
+    """Store and look up tagged questions by JD hash, CV hash and skill."""
+
+    def __init__(self, path, version="1", ttl=30 * 24 * 3600, max_skill_questions=4):
+        self.path = path
+        self.version = version
+        self.ttl = ttl
+        # At most this many questions written for other JDs go into one answer
+        self.max_skill_questions = max_skill_questions
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connections = ThreadConnections(path, pragmas=("synchronous=NORMAL", "foreign_keys=ON"))
+        with self._connections.get() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                " id INTEGER PRIMARY KEY, jd_hash TEXT NOT NULL, cv_hash TEXT NOT NULL,"
+                " question TEXT NOT NULL, shared INTEGER NOT NULL, created REAL NOT NULL,"
+                " version TEXT NOT NULL DEFAULT '', UNIQUE (jd_hash, cv_hash, question))"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(questions)")}
+            if "version" not in columns:
+                # Banks written before versioning; their rows never match a version again
+                conn.execute("ALTER TABLE questions ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS question_skills ("
+                " question_id INTEGER NOT NULL REFERENCES questions (id) ON DELETE CASCADE,"
+                " skill TEXT NOT NULL, PRIMARY KEY (skill, question_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS questions_jd ON questions (jd_hash, created)")
+            conn.execute("CREATE INDEX IF NOT EXISTS questions_created ON questions (created)")
+
+    def lookup(self, jd_hash, cv_hash, skills, limit):
+        """Return up to ``limit`` banked questions for this request, best first.
+
+        ``jd_hash`` is None when no job description was given; then only
+        questions written for the same CV are reused.
+        """
+        now = time.time()
+        conn = self._connections.get()
+        if jd_hash is None:
+            rows = conn.execute(
+                "SELECT question FROM questions WHERE jd_hash = '' AND cv_hash = ? AND version = ?"
+                " AND created > ? ORDER BY created DESC, id LIMIT ?",
+                (cv_hash, self.version, now - self.ttl, limit)
+            ).fetchall()
+            return [row[0] for row in rows]
+
+        rows = conn.execute(
+            "SELECT question FROM questions WHERE jd_hash = ? AND (cv_hash = ? OR shared = 1) AND version = ?"
+            " AND created > ? ORDER BY cv_hash = ? DESC, created DESC, id LIMIT ?",
+            (jd_hash, cv_hash, self.version, now - self.ttl, cv_hash, limit)
+        ).fetchall()
+        questions = list(dict.fromkeys(row[0] for row in rows))
+
+        skills = [skill.lower().strip() for skill in skills if skill and skill.strip()]
+        room = min(limit - len(questions), self.max_skill_questions)
+        if room > 0 and skills:
+            placeholders = ",".join("?" * len(skills))
+            rows = conn.execute(
+                "SELECT q.question FROM questions q JOIN question_skills s ON s.question_id = q.id"
+                f" WHERE s.skill IN ({placeholders}) AND q.shared = 1 AND q.jd_hash != ? AND q.version = ?"
+                " AND q.created > ? GROUP BY q.id ORDER BY COUNT(*) DESC, q.created DESC LIMIT ?",
+                (*skills, jd_hash, self.version, now - self.ttl, room + len(questions))
+            ).fetchall()
+            for (question,) in rows:
+                if len(questions) >= limit or room == 0:
+                    break
+                if question not in questions:
+                    questions.append(question)
+                    room -= 1
+        return questions
+
+    def add(self, jd_hash, cv_hash, questions, skills, guessed_tags=()):
+        """Bank newly generated questions, tagging each with the skills it mentions.
+
+        ``guessed_tags`` holds the questions whose source tag was added by the
+        caller rather than the model; they are kept for this CV only.
+        """
+        guessed_tags = set(guessed_tags)
+        now = time.time()
+        conn = self._connections.get()
+        with conn:
+            for question in questions:
+                # [CV] and [JD+CV] questions are about this candidate only
+                shared = jd_hash is not None and question_tag(question) == "JD" and question not in guessed_tags
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO questions (jd_hash, cv_hash, question, shared, created, version)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (jd_hash or '', cv_hash, question, int(shared), now, self.version)
+                )
+                if cursor.rowcount and shared:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO question_skills (question_id, skill) VALUES (?, ?)",
+                        [(cursor.lastrowid, skill) for skill in question_skills(question, skills)]
+                    )
+            conn.execute("DELETE FROM questions WHERE created <= ?", (now - self.ttl,))
+
+    def record(self, banked, limit):
+        """Count a request as a full hit, a partial hit or a miss."""
+        with self._lock:
+            if banked >= limit:
+                self.hits += 1
+            elif banked:
+                self.partial_hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        # A partial hit still needed the LLM, so it counts as a miss for the hit ratio
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses + self.partial_hits, "partial_hits": self.partial_hits}
@@ -0,0 +1,210 @@
+"""Result cache for LLM-backed responses.
+
+Entries are JSON-serialisable values stored under a hash of the normalised
+inputs. Two backends are provided: an in-process LRU, and a SQLite file that
+every gunicorn worker on the host can share.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_connections import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different extractions share a key."""
+    return _WHITESPACE.sub(' ', text or '').strip()
+
+
+def make_cache_key(*parts):
+    """Return a stable SHA-256 key for the given string parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = str(part).encode('utf-8')
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(encoded).to_bytes(8, 'big'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry.
+
+    Values are stored serialised, so callers can't mutate a cached entry and
+    both backends behave the same.
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(value)
+
+    def set(self, key, value, ttl):
+        value = json.dumps(value)
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, key, func, ttl):
+        """Store ``func(value)`` at ``key`` atomically; see ``SqliteBackend.update``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            current = json.loads(entry[0]) if entry is not None and entry[1] > time.time() else None
+            value = func(current)
+            if value is not None:
+                self._entries[key] = (json.dumps(value), time.time() + ttl)
+                self._entries.move_to_end(key)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteBackend:
+    """SQLite store shared across processes, with LRU eviction by last access."""
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self._connections = ThreadConnections(path, pragmas=("synchronous=NORMAL",))
+        with self._connections.get() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connections.get()
+        with conn:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._connections.get()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def update(self, key, func, ttl):
+        """Replace the value at ``key`` with ``func(value)`` in one transaction.
+
+        ``func`` gets the current value, or None if there is none, and returns
+        the new value, or None to leave the entry alone. The write lock is
+        taken before the read, so concurrent updates from any process run one
+        after another instead of overwriting each other. Returns the new value.
+        """
+        conn = self._connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            value = func(json.loads(row[0]) if row is not None else None)
+            if value is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now + ttl, now)
+                )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return value
+
+    def delete(self, key):
+        conn = self._connections.get()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __len__(self):
+        return self._connections.get().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class ResponseCache:
+    """TTL cache in front of a backend, with hit/miss counters."""
+
+    def __init__(self, backend, ttl=24 * 3600):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except sqlite3.Error as e:
+            # A broken cache must never fail the request it is meant to speed up
+            logger.warning("Response cache read failed: %s", e)
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, value, self.ttl)
+        except sqlite3.Error as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def create_cache(backend='memory', path=None, ttl=24 * 3600, max_entries=1000):
+    """Build a ResponseCache from configuration values."""
+    if backend == 'sqlite':
+        return ResponseCache(SqliteBackend(path, max_entries=max_entries), ttl=ttl)
+    if backend != 'memory':
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return ResponseCache(MemoryBackend(max_entries=max_entries), ttl=ttl)
@@ -0,0 +1,58 @@
+"""Signed session tokens issued at login.
+
+A token carries the student's id, name and email, signed with the server
+secret, so later requests can identify the student without another
+Firestore lookup or password hash. Every worker must share the secret, so
+without one no tokens are issued at all.
+"""
+import logging
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class SessionTokens:
+    """Issue and check time-limited signed session tokens."""
+
+    def __init__(self, secret=None, max_age=7 * 24 * 3600):
+        self.max_age = max_age
+        self._serializer = None
+        if secret:
+            self._serializer = URLSafeTimedSerializer(secret, salt='student-session')
+        else:
+            # A per-process secret would make tokens fail on every other worker
+            logger.warning("SESSION_SECRET is not set; session tokens are disabled")
+
+    @property
+    def enabled(self):
+        return self._serializer is not None
+
+    def issue(self, student):
+        """Return a token for a ``{"id", "name", "email"}`` student dict, or None if disabled."""
+        if not self.enabled:
+            return None
+        return self._serializer.dumps({
+            "id": student.get("id"),
+            "name": student.get("name"),
+            "email": student.get("email")
+        })
+
+    def verify(self, token):
+        """Return the student dict in ``token``, or None if it is invalid or expired."""
+        if not self.enabled:
+            return None
+        try:
+            return self._serializer.loads(token, max_age=self.max_age)
+        except SignatureExpired:
+            return None
+        except BadSignature:
+            return None
+
+    def from_request(self, request):
+        """Return the student for a request's ``Authorization: Bearer`` token, or None."""
+        header = request.headers.get("Authorization", "")
+        scheme, _, token = header.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        return self.verify(token.strip())
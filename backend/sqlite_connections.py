@@ -0,0 +1,41 @@
+"""Per-thread SQLite connections that survive gunicorn forks.
+
+SQLite connections must not be shared between threads, and one inherited
+across a fork must never be used by the child. ``ThreadConnections`` hands
+each thread of each process its own connection, opened on first use with
+WAL journaling so readers and a writer in different workers don't block
+each other.
+"""
+import os
+import sqlite3
+import threading
+
+
+class ThreadConnections:
+    """Open and reuse one connection to ``path`` per thread and process.
+
+    ``pragmas`` are run, in order, on every new connection after
+    ``journal_mode=WAL``.
+    """
+
+    def __init__(self, path, timeout=5.0, pragmas=(), row_factory=None):
+        self.path = path
+        self.timeout = timeout
+        self.pragmas = tuple(pragmas)
+        self.row_factory = row_factory
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        # Never reuse a connection inherited across a gunicorn fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            conn.execute("PRAGMA journal_mode=WAL")
+            for pragma in self.pragmas:
+                conn.execute(f"PRAGMA {pragma}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,53 @@
+"""Server-sent event helpers for streaming endpoints."""
+import json
+
+from flask import Response, request, stream_with_context
+
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    """Wrap a generator of formatted events in a streaming response."""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop reverse proxies from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+def wants_stream(data=None):
+    """True if the client asked for a streamed response."""
+    if data and data.get('stream'):
+        return True
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def iter_completion_text(stream):
+    """Yield the text deltas from a streamed OpenAI chat completion."""
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+def iter_completion_lines(stream):
+    """Yield complete lines from a streamed OpenAI chat completion as they finish."""
+    buffer = ''
+    for delta in iter_completion_text(stream):
+        buffer += delta
+        while '\n' in buffer:
+            line, buffer = buffer.split('\n', 1)
+            yield line
+    if buffer:
+        yield buffer
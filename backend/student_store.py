@@ -0,0 +1,150 @@
+"""Read-through cache in front of Firestore student lookups by email.
+
+Found students are cached with a TTL, and writes through the store
+invalidate the affected email. Unknown emails are never cached: another
+worker may create the student at any moment, and sign-up and Google sign-in
+rely on a miss being current before they create a document. Concurrent
+lookups for the same email still share one Firestore query. The store
+only needs a Firestore-like client (``collection().where().limit().get()``),
+so it runs unchanged against the Firestore emulator or an in-memory fake.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "students"
+
+
+class StudentRecord:
+    """Cached copy of a student document, shaped like a DocumentSnapshot."""
+
+    __slots__ = ("id", "_data")
+
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _Lookup:
+    """A Firestore query in flight that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class StudentStore:
+    """Email-keyed student lookups with TTL caching and request coalescing."""
+
+    def __init__(self, get_client, ttl=300, max_entries=10000):
+        self._get_client = get_client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        # Bumped on every write so lookups that raced a write aren't cached
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "lookups": 0,
+            "hits": 0,
+            "coalesced": 0,
+            "queries": 0,
+            "query_seconds_total": 0.0,
+            "query_seconds_max": 0.0,
+        }
+
+    def _collection(self):
+        return self._get_client().collection(COLLECTION)
+
+    def find_by_email(self, email):
+        """Return the StudentRecord for ``email``, or None if there is none."""
+        # Firestore matches emails exactly, so the cache key does too
+        key = email
+        with self._lock:
+            self._metrics["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._metrics["hits"] += 1
+                return entry[0]
+
+            lookup = self._inflight.get(key)
+            leader = lookup is None
+            if leader:
+                lookup = self._inflight[key] = _Lookup()
+                writes_at_start = self._writes
+            else:
+                self._metrics["coalesced"] += 1
+
+        if not leader:
+            lookup.done.wait()
+            if lookup.error is not None:
+                raise lookup.error
+            return lookup.result
+
+        try:
+            lookup.result = self._query(email)
+        except Exception as e:
+            lookup.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if lookup.error is None and self._writes == writes_at_start:
+                    self._remember(key, lookup.result)
+            lookup.done.set()
+        return lookup.result
+
+    def _query(self, email):
+        started = time.perf_counter()
+        docs = self._collection().where("email", "==", email).limit(1).get()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._metrics["queries"] += 1
+            self._metrics["query_seconds_total"] += elapsed
+            self._metrics["query_seconds_max"] = max(self._metrics["query_seconds_max"], elapsed)
+        if not docs:
+            return None
+        return StudentRecord(docs[0].id, docs[0].to_dict())
+
+    def _remember(self, key, record):
+        if record is None:
+            return
+        self._entries[key] = (record, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, email):
+        with self._lock:
+            self._writes += 1
+            self._entries.pop(email, None)
+
+    def add(self, data):
+        """Create a student document and drop any cached entry for its email."""
+        result = self._collection().add(data)
+        self.invalidate(data["email"])
+        return result
+
+    def update(self, student_id, email, fields):
+        """Update a student document and drop the cached entry for ``email``."""
+        self._collection().document(student_id).update(fields)
+        self.invalidate(email)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["entries"] = len(self._entries)
+        stats["misses"] = stats["lookups"] - stats["hits"]
+        stats["query_seconds_avg"] = (
+            stats["query_seconds_total"] / stats["queries"] if stats["queries"] else 0.0
+        )
+        return stats
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def application_module(tmp_path_factory):
+    """The Flask app module, imported once with its stores in a scratch directory."""
+    pytest.importorskip("flask")
+    pytest.importorskip("openai")
+    scratch = str(tmp_path_factory.mktemp("app"))
+    os.environ.update({
+        "JOB_DB_PATH": os.path.join(scratch, "jobs.sqlite3"),
+        "LLM_CACHE_PATH": os.path.join(scratch, "llm_cache.sqlite3"),
+        "QUESTION_BANK_PATH": os.path.join(scratch, "question_bank.sqlite3"),
+        "CHAT_SESSION_PATH": os.path.join(scratch, "chat_sessions.sqlite3"),
+        "LOG_FILE": os.path.join(scratch, "app.log"),
+        "SESSION_SECRET": "test-secret",
+    })
+    # Relative data paths in the app resolve against the backend directory
+    cwd = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        import application
+    finally:
+        os.chdir(cwd)
+    return application
+
+
+@pytest.fixture
+def app(application_module, monkeypatch):
+    """The app module wired to a fresh in-memory Firestore."""
+    from benchmarks.fake_firestore import FakeFirestore
+    from student_store import StudentStore
+
+    client = FakeFirestore()
+    monkeypatch.setattr(application_module, "db", client)
+    monkeypatch.setattr(application_module, "students", StudentStore(lambda: client))
+    return application_module
@@ -0,0 +1,84 @@
+"""ChatSessions on a SQLite store shared by several "workers"."""
+import threading
+
+from chat_sessions import ChatSessions
+from response_cache import SqliteBackend
+
+
+def no_summary(summary, turns, max_tokens):
+    raise RuntimeError("no LLM in tests")
+
+
+def make_workers(tmp_path, count, **kwargs):
+    """Separate ChatSessions instances over one database, like separate gunicorn workers."""
+    path = str(tmp_path / "chat_sessions.sqlite3")
+    return [ChatSessions(SqliteBackend(path), no_summary, **kwargs) for _ in range(count)]
+
+
+def test_next_turn_is_served_by_another_worker(tmp_path):
+    first, second = make_workers(tmp_path, 2)
+    session = first.create("JD and CV")
+
+    first.record(session["id"], "hello", "hi")
+    stored = second.get(session["id"])
+
+    assert stored["context"] == "JD and CV"
+    assert [turn["content"] for turn in stored["turns"]] == ["hello", "hi"]
+
+
+def test_concurrent_turns_on_different_workers_are_all_kept(tmp_path):
+    workers = make_workers(tmp_path, 4, history_tokens=100000)
+    session_id = workers[0].create()["id"]
+
+    def send(worker, number):
+        for turn in range(10):
+            worker.record(session_id, f"q{number}-{turn}", f"a{number}-{turn}")
+
+    threads = [threading.Thread(target=send, args=(worker, number)) for number, worker in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    turns = workers[0].get(session_id)["turns"]
+    assert len(turns) == 80
+    # Each question stays next to its answer
+    for question, answer in zip(turns[::2], turns[1::2]):
+        assert question["content"][1:] == answer["content"][1:]
+
+
+def test_fold_keeps_turns_recorded_while_summarizing(tmp_path):
+    path = str(tmp_path / "chat_sessions.sqlite3")
+    first = ChatSessions(SqliteBackend(path), no_summary, history_tokens=40, summary_tokens=50)
+    # The recording worker never goes over budget, so only ``first`` folds
+    second = ChatSessions(SqliteBackend(path), no_summary, history_tokens=100000)
+    session_id = first.create()["id"]
+    for turn in range(6):
+        second.record(session_id, f"question {turn} " * 5, f"answer {turn} " * 5)
+
+    def summarize(summary, turns, max_tokens):
+        # Another worker records a turn while the summary is being written
+        second.record(session_id, "late question", "late answer")
+        return "summary"
+
+    first.summarize = summarize
+    first._fold(session_id)
+
+    session = first.get(session_id)
+    assert session["summary"] == "summary"
+    assert session["folded"] > 0
+    assert session["turns"][-2:] == [
+        {"role": "user", "content": "late question"},
+        {"role": "assistant", "content": "late answer"},
+    ]
+    assert len(session["turns"]) + session["folded"] == 14
+
+
+def test_record_after_delete_is_dropped(tmp_path):
+    first, second = make_workers(tmp_path, 2)
+    session_id = first.create()["id"]
+
+    second.delete(session_id)
+    first.record(session_id, "hello", "hi")
+
+    assert first.get(session_id) is None
@@ -0,0 +1,62 @@
+"""/google-auth with a stubbed token verifier and an in-memory Firestore."""
+EMAIL = "student@pilani.bits-pilani.ac.in"
+
+
+def google_login(app, monkeypatch, email=EMAIL, claims=None):
+    if claims is None:
+        claims = {"email": email, "email_verified": True}
+    monkeypatch.setattr(app.google_verifier, "verify", lambda credential: dict(claims))
+    return app.application.test_client().post("/google-auth", json={
+        "credential": "stub-token",
+        "email": email,
+        "name": "Asha",
+        "googleId": "google-123"
+    })
+
+
+def test_first_google_sign_in_creates_the_student(app, monkeypatch):
+    response = google_login(app, monkeypatch)
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["success"] is True
+    assert body["student"]["email"] == EMAIL
+    assert body["token"]
+
+    stored = app.students.find_by_email(EMAIL)
+    assert stored.id == body["student"]["id"]
+    assert stored.to_dict()["googleId"] == "google-123"
+    assert "createdAt" in stored.to_dict()
+
+
+def test_returning_google_user_is_not_created_again(app, monkeypatch):
+    assert google_login(app, monkeypatch).status_code == 201
+
+    response = google_login(app, monkeypatch)
+
+    assert response.status_code == 200
+    assert len(app.db.collection("students").docs) == 1
+
+
+def test_non_bits_email_is_refused(app, monkeypatch):
+    response = google_login(app, monkeypatch, email="someone@gmail.com")
+
+    assert response.status_code == 403
+    assert not app.db.collection("students").docs
+
+
+def test_token_for_another_email_is_refused(app, monkeypatch):
+    claims = {"email": "attacker@pilani.bits-pilani.ac.in", "email_verified": True}
+
+    response = google_login(app, monkeypatch, claims=claims)
+
+    assert response.status_code == 401
+    assert "token" not in response.get_json()
+    assert not app.db.collection("students").docs
+
+
+def test_unverified_google_email_is_refused(app, monkeypatch):
+    response = google_login(app, monkeypatch, claims={"email": EMAIL, "email_verified": False})
+
+    assert response.status_code == 401
+    assert "token" not in response.get_json()
@@ -0,0 +1,165 @@
+"""GoogleTokenVerifier against fixture keys served by a fake certificate endpoint."""
+import datetime
+import time
+
+import pytest
+
+pytest.importorskip("google.auth")
+x509 = pytest.importorskip("cryptography.x509")
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+from google_tokens import GoogleTokenVerifier
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+def make_key(key_id):
+    """Return ``(signer, certificate_pem)`` for a fresh self-signed RSA key."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, key_id)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    signer = crypt.RSASigner.from_string(key_pem, key_id=key_id)
+    return signer, certificate.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def make_token(signer, **claims):
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234567890",
+        "email": "student@pilani.bits-pilani.ac.in",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    payload.update(claims)
+    return jwt.encode(signer, payload).decode()
+
+
+class FakeResponse:
+    def __init__(self, certs, max_age):
+        self._certs = dict(certs)
+        self.headers = {"Cache-Control": f"public, max-age={max_age}"}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return dict(self._certs)
+
+
+class FakeSession:
+    """Serves whatever is in ``certs`` as Google's certificate endpoint."""
+
+    def __init__(self, certs, max_age=3600):
+        self.certs = certs
+        self.max_age = max_age
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        return FakeResponse(self.certs, self.max_age)
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {key_id: make_key(key_id) for key_id in ("key-1", "key-2")}
+
+
+def make_verifier(certs, **kwargs):
+    session = FakeSession(certs, **kwargs)
+    return GoogleTokenVerifier(CLIENT_ID, session=session), session
+
+
+def test_certificates_are_fetched_once_while_fresh(keys):
+    signer, cert = keys["key-1"]
+    verifier, session = make_verifier({"key-1": cert})
+
+    verifier.verify(make_token(signer, sub="a"))
+    verifier.verify(make_token(signer, sub="b"))
+
+    assert session.calls == 1
+    assert verifier.cert_fetches == 1
+
+
+def test_expired_certificates_are_refetched(keys):
+    signer, cert = keys["key-1"]
+    verifier, session = make_verifier({"key-1": cert}, max_age=0)
+
+    verifier.verify(make_token(signer, sub="a"))
+    verifier.verify(make_token(signer, sub="b"))
+
+    assert session.calls == 2
+
+
+def test_unknown_key_id_forces_a_refresh(keys):
+    old_signer, old_cert = keys["key-1"]
+    new_signer, new_cert = keys["key-2"]
+    verifier, session = make_verifier({"key-1": old_cert})
+    verifier.verify(make_token(old_signer))
+
+    # Google rotates to a key the cached certificates don't have yet
+    session.certs = {"key-1": old_cert, "key-2": new_cert}
+    claims = verifier.verify(make_token(new_signer, sub="rotated"))
+
+    assert claims["sub"] == "rotated"
+    assert session.calls == 2
+
+
+def test_verified_tokens_are_memoized(keys):
+    signer, cert = keys["key-1"]
+    verifier, session = make_verifier({"key-1": cert})
+    token = make_token(signer)
+
+    first = verifier.verify(token)
+    second = verifier.verify(token)
+
+    assert first == second
+    assert verifier.token_hits == 1
+    assert session.calls == 1
+
+
+def test_wrong_issuer_is_rejected(keys):
+    signer, cert = keys["key-1"]
+    verifier, _ = make_verifier({"key-1": cert})
+
+    with pytest.raises(ValueError, match="Wrong issuer"):
+        verifier.verify(make_token(signer, iss="https://evil.example.com"))
+
+
+def test_wrong_audience_is_rejected(keys):
+    signer, cert = keys["key-1"]
+    verifier, _ = make_verifier({"key-1": cert})
+
+    with pytest.raises(ValueError):
+        verifier.verify(make_token(signer, aud="someone-else"))
+
+
+def test_rejected_tokens_are_not_memoized(keys):
+    signer, cert = keys["key-1"]
+    verifier, _ = make_verifier({"key-1": cert})
+    token = make_token(signer, iss="https://evil.example.com")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            verifier.verify(token)
+    assert verifier.token_hits == 0
@@ -0,0 +1,22 @@
+"""Token-budget trimming of extracted JD/CV text."""
+from prompt_compaction import estimate_tokens, trim_to_budget
+
+
+def test_text_within_budget_is_unchanged():
+    text = "Skills\nPython, SQL"
+    assert trim_to_budget(text, 100) == text
+
+
+def test_long_line_is_cut_to_the_budget():
+    text = "Summary\n" + "word " * 400
+    trimmed = trim_to_budget(text, 50)
+    assert estimate_tokens(trimmed) <= 50
+    assert trimmed.startswith("Summary\nword word")
+
+
+def test_line_after_an_exact_fill_is_dropped():
+    # The heading and first line use up the whole 10-token budget
+    text = "Skills\n" + "x" * 32 + "\n" + "word " * 200
+    trimmed = trim_to_budget(text, 10)
+    assert estimate_tokens(trimmed) <= 10
+    assert "word" not in trimmed
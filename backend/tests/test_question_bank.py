@@ -0,0 +1,57 @@
+"""QuestionBank sharing rules and prompt versioning."""
+import sqlite3
+
+from question_bank import QuestionBank
+
+JD_QUESTION = "How would you design the Kafka pipelines this role owns? [JD]"
+CV_QUESTION = "Walk through the Kafka migration on your CV. [CV]"
+
+
+def make_bank(tmp_path, version="1"):
+    return QuestionBank(str(tmp_path / "question_bank.sqlite3"), version=version)
+
+
+def test_same_cv_gets_every_question_back(tmp_path):
+    bank = make_bank(tmp_path)
+    bank.add("jd", "cv", [JD_QUESTION, CV_QUESTION], ["Kafka"])
+
+    assert set(bank.lookup("jd", "cv", ["Kafka"], 10)) == {JD_QUESTION, CV_QUESTION}
+
+
+def test_other_candidates_only_get_model_tagged_jd_questions(tmp_path):
+    bank = make_bank(tmp_path)
+    guessed = "Tell us how you scaled the Kafka consumers at your last job? [JD]"
+    bank.add("jd", "cv", [JD_QUESTION, CV_QUESTION, guessed], ["Kafka"], guessed_tags=[guessed])
+
+    assert bank.lookup("jd", "other-cv", ["Kafka"], 10) == [JD_QUESTION]
+    assert bank.lookup("other-jd", "other-cv", ["Kafka"], 10) == [JD_QUESTION]
+
+
+def test_questions_from_an_older_prompt_version_are_not_served(tmp_path):
+    old = make_bank(tmp_path, version="1")
+    old.add("jd", "cv", [JD_QUESTION], ["Kafka"])
+    old.add(None, "cv", [CV_QUESTION], ["Kafka"])
+
+    new = make_bank(tmp_path, version="2")
+    assert new.lookup(None, "cv", ["Kafka"], 10) == []
+    assert new.lookup("jd", "cv", ["Kafka"], 10) == []
+    assert new.lookup("other-jd", "cv", ["Kafka"], 10) == []
+
+
+def test_bank_without_a_version_column_is_upgraded(tmp_path):
+    path = str(tmp_path / "question_bank.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE questions (id INTEGER PRIMARY KEY, jd_hash TEXT NOT NULL, cv_hash TEXT NOT NULL,"
+            " question TEXT NOT NULL, shared INTEGER NOT NULL, created REAL NOT NULL,"
+            " UNIQUE (jd_hash, cv_hash, question))"
+        )
+        conn.execute(
+            "INSERT INTO questions (jd_hash, cv_hash, question, shared, created) VALUES ('jd', 'cv', ?, 1, 1e12)",
+            (JD_QUESTION,)
+        )
+
+    bank = QuestionBank(path, version="1")
+    assert bank.lookup("jd", "cv", [], 10) == []
+    bank.add("jd", "cv", [CV_QUESTION], [])
+    assert bank.lookup("jd", "cv", [], 10) == [CV_QUESTION]
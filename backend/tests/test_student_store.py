@@ -0,0 +1,99 @@
+"""StudentStore against the in-memory Firestore fake."""
+import threading
+import time
+
+from benchmarks.fake_firestore import FakeFirestore
+from student_store import StudentStore
+
+EMAIL = "student@pilani.bits-pilani.ac.in"
+
+
+def make_store(client, **kwargs):
+    return StudentStore(lambda: client, **kwargs)
+
+
+def test_found_students_are_served_from_cache():
+    store = make_store(FakeFirestore())
+    store.add({"name": "Asha", "email": EMAIL})
+
+    first = store.find_by_email(EMAIL)
+    second = store.find_by_email(EMAIL)
+
+    assert first.to_dict()["name"] == second.to_dict()["name"] == "Asha"
+    stats = store.stats()
+    assert stats["queries"] == 1
+    assert stats["hits"] == 1
+
+
+def test_expired_entries_are_queried_again():
+    store = make_store(FakeFirestore(), ttl=0)
+    store.add({"name": "Asha", "email": EMAIL})
+
+    store.find_by_email(EMAIL)
+    store.find_by_email(EMAIL)
+
+    assert store.stats()["queries"] == 2
+
+
+def test_unknown_emails_are_not_cached():
+    store = make_store(FakeFirestore())
+
+    assert store.find_by_email(EMAIL) is None
+    assert store.find_by_email(EMAIL) is None
+    assert store.stats()["queries"] == 2
+
+
+def test_student_added_by_another_worker_is_found():
+    client = FakeFirestore()
+    worker_a, worker_b = make_store(client), make_store(client)
+
+    assert worker_b.find_by_email(EMAIL) is None
+    worker_a.add({"name": "Asha", "email": EMAIL})
+
+    found = worker_b.find_by_email(EMAIL)
+    assert found is not None
+    assert found.to_dict()["name"] == "Asha"
+
+
+def test_update_invalidates_the_email():
+    store = make_store(FakeFirestore())
+    store.add({"name": "Asha", "email": EMAIL, "password": "old"})
+    student = store.find_by_email(EMAIL)
+
+    store.update(student.id, EMAIL, {"password": "new"})
+
+    assert store.find_by_email(EMAIL).to_dict()["password"] == "new"
+
+
+def test_concurrent_lookups_share_one_query():
+    store = make_store(FakeFirestore(latency=0.2))
+    store.add({"name": "Asha", "email": EMAIL})
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(store.find_by_email(EMAIL))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert all(result.to_dict()["email"] == EMAIL for result in results)
+    stats = store.stats()
+    assert stats["queries"] == 1
+    assert stats["coalesced"] == 7
+
+
+def test_lookup_racing_a_write_is_not_cached():
+    client = FakeFirestore(latency=0.2)
+    store = make_store(client)
+    client.collection("students").docs["doc-1"] = {"name": "Asha", "email": EMAIL, "password": "old"}
+
+    lookup = threading.Thread(target=store.find_by_email, args=(EMAIL,))
+    lookup.start()
+    # Let the lookup's query get under way before the write lands
+    time.sleep(0.05)
+    store.update("doc-1", EMAIL, {"password": "new"})
+    lookup.join()
+
+    assert store.find_by_email(EMAIL).to_dict()["password"] == "new"
+    assert store.stats()["queries"] == 2
@@ -0,0 +1,166 @@
+"""Bounded, hashed storage for uploaded PDFs, filled while the request is parsed.
+
+Werkzeug writes each uploaded file into the stream returned by
+``Request._get_file_stream`` chunk by chunk as it reads the request body.
+``UploadFile`` is that stream. It hashes every chunk as it arrives, keeps
+small files in memory and moves larger ones to a named temporary file. It
+stops storing a file as soon as it goes over the size limit or its first
+bytes show it is not a PDF. The upload is then rejected before any parsing,
+and worker memory never holds more than the spool threshold per file.
+
+Files on disk are handed to PDF extraction by path, and the extraction
+processes memory-map them instead of receiving a copy of their bytes.
+"""
+import hashlib
+import io
+import tempfile
+
+from flask import Request
+
+from pdf_extraction import PdfLimitError
+
+# A PDF header must start within the first 1024 bytes of the file
+PDF_MAGIC = b"%PDF-"
+HEADER_WINDOW = 1024
+
+
+class NotPdfError(ValueError):
+    """Raised when an upload does not start with a PDF header."""
+
+
+def check_pdf_header(head):
+    if PDF_MAGIC not in head[:HEADER_WINDOW]:
+        raise NotPdfError("File is not a PDF")
+
+
+class UploadFile:
+    """Writable upload buffer that hashes, size-checks and spools as it fills.
+
+    Reading from a rejected upload raises the rejection, so code that just
+    calls ``read()`` on a ``FileStorage`` gets the same error as extraction.
+    """
+
+    def __init__(self, max_bytes, spool_bytes=1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        self.directory = directory
+        self.size = 0
+        self.path = None
+        self.error = None
+        self._digest = hashlib.sha256()
+        self._head = b""
+        self._file = io.BytesIO()
+
+    def write(self, data):
+        self.size += len(data)
+        if self.error is not None:
+            return len(data)
+        if self.size > self.max_bytes:
+            self._reject(PdfLimitError(f"PDF is over the {self.max_bytes} byte limit"))
+            return len(data)
+        if len(self._head) < HEADER_WINDOW:
+            self._head += bytes(data[:HEADER_WINDOW - len(self._head)])
+            if len(self._head) >= HEADER_WINDOW and PDF_MAGIC not in self._head:
+                self._reject(NotPdfError("File is not a PDF"))
+                return len(data)
+
+        self._digest.update(data)
+        self._file.write(data)
+        if self.path is None and self.size > self.spool_bytes:
+            self._rollover()
+        return len(data)
+
+    def _rollover(self):
+        spooled = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", dir=self.directory)
+        spooled.write(self._file.getbuffer())
+        self._file = spooled
+        self.path = spooled.name
+
+    def _reject(self, error):
+        # Drop what was stored so far; the rest of the file is only counted
+        self.error = error
+        self._file.close()
+        self._file = io.BytesIO()
+        self.path = None
+
+    def check(self):
+        """Raise the upload's rejection, if it was rejected or is too short to be a PDF."""
+        if self.error is None:
+            try:
+                check_pdf_header(self._head)
+            except NotPdfError as e:
+                self.error = e
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def content_hash(self):
+        """SHA-256 hex digest of the upload, the same key as ``pdf_cache.content_hash``."""
+        return self._digest.hexdigest()
+
+    def source(self):
+        """What to hand to ``PdfExtractor``: the spool file's path, or the bytes of a small upload."""
+        self.check()
+        if self.path is not None:
+            self._file.flush()
+            return self.path
+        return self._file.getvalue()
+
+    # File interface used by Werkzeug's parser and FileStorage
+
+    def read(self, size=-1):
+        self.check()
+        return self._file.read(size)
+
+    def readline(self, size=-1):
+        self.check()
+        return self._file.readline(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def close(self):
+        # Closing the named temporary file also deletes it
+        self._file.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def __iter__(self):
+        self.check()
+        return iter(self._file)
+
+
+class IngestRequest(Request):
+    """Flask request that parses uploaded files into ``UploadFile`` buffers.
+
+    Set ``upload_max_bytes``, ``upload_spool_bytes`` and ``upload_dir`` on a
+    subclass (or the app's ``request_class``) to configure them.
+    """
+
+    upload_max_bytes = 10 * 1024 * 1024
+    upload_spool_bytes = 1024 * 1024
+    upload_dir = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload = UploadFile(self.upload_max_bytes, self.upload_spool_bytes, self.upload_dir)
+        if content_length is not None and content_length > self.upload_max_bytes:
+            # The client announced the size, so none of this file needs storing
+            upload._reject(PdfLimitError(f"PDF is {content_length} bytes, the limit is {self.upload_max_bytes} bytes"))
+        return upload